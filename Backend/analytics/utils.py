@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size history for several metrics in one preallocated array.
+
+    Every sample is written twice, at slot i and i + capacity, so the newest
+    samples of a metric are always one contiguous slice. view() hands that
+    slice out without copying.
+    """
+
+    def __init__(self, capacity, metrics, dtype=np.float64):
+        self.capacity = capacity
+        self.data = np.zeros((metrics, 2 * capacity), dtype=dtype)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, values):
+        self.data[:, self.head] = values
+        self.data[:, self.head + self.capacity] = values
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, rows):
+        """
+        Appends a (samples, metrics) block in one vectorized write.
+        """
+
+        rows = rows[-self.capacity:]
+        slots = (self.head + np.arange(len(rows))) % self.capacity
+
+        self.data[:, slots] = rows.T
+        self.data[:, slots + self.capacity] = rows.T
+
+        self.head = (self.head + len(rows)) % self.capacity
+        self.size = min(self.size + len(rows), self.capacity)
+
+    def view(self, metric, last=None):
+        """
+        Zero-copy view of the newest samples of one metric, oldest first.
+        """
+
+        count = self.size if last is None else min(last, self.size)
+        end = self.head + self.capacity
+        return self.data[metric, end - count:end]
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
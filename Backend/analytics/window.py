@@ -0,0 +1,166 @@
+from PyQt5 import QtCore, QtWidgets
+import numpy as np
+import pyqtgraph as pg
+import time
+
+from face_detection.core.channel import ScoreReader
+from .utils import RingBuffer
+
+#ring buffer rows
+TIME, SLEEP, ATTENTION, STRESS, CONFUSION = range(5)
+
+#seconds without new scores before checking whether the writer died
+STALE_SECONDS = 2.0
+
+
+class TeacherAnalytics(QtWidgets.QMainWindow):
+
+    def __init__(self, window_seconds=60, window_samples=None, sample_rate=30, refresh_ms=50,
+                 channel=None):
+        """
+        The window is window_samples long when given, otherwise window_seconds
+        at the expected sample_rate. Curves are redrawn at most every refresh_ms.
+
+        channel names the shared-memory score channel written by the detection
+        process; it is polled on the redraw timer instead of calling update().
+        """
+        super().__init__()
+
+        self.setWindowTitle("CognitiveLens - Teacher Analytics")
+        self.setGeometry(150, 100, 1100, 800)
+
+        self.window_seconds = window_seconds
+        self.start_time = time.time()
+
+        pg.setConfigOption('background', '#121212')
+        pg.setConfigOption('foreground', 'w')
+
+        self.widget = pg.GraphicsLayoutWidget()
+        self.setCentralWidget(self.widget)
+
+        #time + score history, preallocated once
+        if window_samples is None:
+            window_samples = int(window_seconds * sample_rate)
+        else:
+            self.window_seconds = None
+
+        self.history = RingBuffer(window_samples, 5)
+        self.dirty = False
+
+        self.channel = channel
+        self.reader = None
+        self.quiet_since = 0.0
+
+        #create plots
+        self.p1 = self.widget.addPlot(title="Drowsiness")
+        self.p1.setYRange(0, 100)
+
+        self.widget.nextRow()
+
+        #attention is shown as the raw head turn rate, it has no 0-100 score
+        self.p2 = self.widget.addPlot(title="Attention: head turns / min")
+        self.p2.enableAutoRange(axis='y')
+        self.p2.setLimits(yMin=0)
+
+        self.widget.nextRow()
+
+        self.p3 = self.widget.addPlot(title="Stress")
+        self.p3.setYRange(0, 100)
+
+        self.widget.nextRow()
+
+        self.p4 = self.widget.addPlot(title="Confusion")
+        self.p4.setYRange(0, 100)
+
+        #curves
+        self.c1 = self.p1.plot(pen=pg.mkPen('#FF5555', width=3))
+        self.c2 = self.p2.plot(pen=pg.mkPen('#00AAFF', width=3))
+        self.c3 = self.p3.plot(pen=pg.mkPen('#FFAA00', width=3))
+        self.c4 = self.p4.plot(pen=pg.mkPen('#AA00FF', width=3))
+
+        #long windows: only draw what is visible, decimated to screen resolution
+        for curve in (self.c1, self.c2, self.c3, self.c4):
+            curve.setClipToView(True)
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setSkipFiniteCheck(True)
+
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(refresh_ms)
+
+    def update(self, sleep, attention, stress, confusion):
+
+        current_time = time.time() - self.start_time
+
+        self.history.append((current_time, sleep, attention, stress, confusion))
+        self.dirty = True
+
+    def tick(self):
+        if self.channel is not None:
+            self.poll()
+        self.redraw()
+
+    def poll(self):
+        """
+        Moves every score written since the last poll into the history.
+        """
+
+        if self.reader is None:
+            self.reader = ScoreReader.attach(self.channel)
+            if self.reader is None:
+                return
+
+            #new detection session, its timestamps start from zero again
+            self.history.clear()
+            self.quiet_since = time.monotonic()
+
+        rows = self.reader.read()
+        now = time.monotonic()
+        if len(rows):
+            self.quiet_since = now
+
+        #detection process exited, wait for the next one
+        if self.reader.closed:
+            self.reader.close()
+            self.reader = None
+
+        #a crashed or replaced writer never sets closed, check while it is quiet
+        elif now - self.quiet_since > STALE_SECONDS:
+            self.quiet_since = now
+            if self.reader.superseded():
+                self.reader.close()
+                self.reader = None
+
+        if not len(rows):
+            return
+
+        #timestamp_ms, sleepy, turns_per_minute, stress_score, confusion_score
+        rows = np.nan_to_num(rows)
+        samples = np.empty((len(rows), 5))
+        samples[:, TIME] = rows[:, 0] / 1000
+        samples[:, SLEEP] = rows[:, 1] * 100
+        samples[:, ATTENTION] = rows[:, 2]
+        samples[:, STRESS] = rows[:, 3]
+        samples[:, CONFUSION] = rows[:, 4]
+
+        self.history.extend(samples)
+        self.dirty = True
+
+    def redraw(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+
+        time_data = self.history.view(TIME)
+
+        #sliding window in seconds, samples are already bounded by the buffer
+        start = 0
+        if self.window_seconds is not None and len(time_data):
+            start = np.searchsorted(time_data, time_data[-1] - self.window_seconds)
+
+        time_data = time_data[start:]
+        self.c1.setData(time_data, self.history.view(SLEEP)[start:])
+        self.c2.setData(time_data, self.history.view(ATTENTION)[start:])
+        self.c3.setData(time_data, self.history.view(STRESS)[start:])
+        self.c4.setData(time_data, self.history.view(CONFUSION)[start:])
+
@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from analytics.utils import RingBuffer
+from face_detection.core.channel import SCORE_FIELDS, ScoreReader
+
+
+def _json_value(value, precision):
+    # NaN is not valid JSON, a detector with no value is sent as null
+    if math.isnan(value):
+        return None
+    return round(value, precision)
+
+
+class Student:
+    """
+    One score channel: its reader, score history and the last values sent.
+    """
+
+    def __init__(self, name, channel, history):
+        self.name = name
+        self.channel = channel
+        self.reader = None
+        self.history = RingBuffer(history, len(SCORE_FIELDS))
+        self.latest = {}
+        self.quiet_since = 0.0
+
+    @property
+    def online(self):
+        return self.reader is not None
+
+
+class Client:
+    """
+    Updates waiting for one dashboard connection.
+
+    Deltas are merged into a single pending dict instead of being queued, so
+    a client that reads slower than the hub polls gets the newest value of
+    every changed field in one message and never holds more than one value
+    per student and field.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.event = asyncio.Event()
+        self.sent = 0
+        self.coalesced = 0
+
+    def push(self, delta):
+        if self.pending:
+            self.coalesced += 1
+
+        for student, fields in delta.items():
+            self.pending.setdefault(student, {}).update(fields)
+        self.event.set()
+
+    async def next(self):
+        """
+        Waits for and takes everything pending.
+        """
+
+        await self.event.wait()
+        self.event.clear()
+
+        pending, self.pending = self.pending, {}
+        self.sent += 1
+        return pending
+
+
+class ScoreHub:
+    """
+    Reads one shared-memory score channel per student and fans the scores
+    out to every connected client.
+
+    poll() drains each channel into that student's history and returns one
+    batch for all students holding only the fields whose rounded value
+    changed since the last batch, plus "online" when a detection process
+    starts or exits. A channel quiet for stale_seconds is checked for a
+    writer that crashed or was replaced without closing it. poll() is
+    called on the event loop, the detection processes only ever write to
+    their channels.
+    """
+
+    def __init__(self, channels, history=9000, precision=2, stale_seconds=2.0):
+        self.students = {name: Student(name, channel, history) for name, channel in channels.items()}
+        self.precision = precision
+        self.stale_seconds = stale_seconds
+        self.clients = set()
+
+    def poll(self):
+        delta = {}
+
+        for student in self.students.values():
+            changed = self._poll(student)
+            if changed:
+                delta[student.name] = changed
+
+        if delta:
+            for client in self.clients:
+                client.push(delta)
+
+        return delta
+
+    def _poll(self, student):
+        changed = {}
+
+        if student.reader is None:
+            student.reader = ScoreReader.attach(student.channel)
+            if student.reader is None:
+                return changed
+
+            # new detection session, its timestamps start from zero again
+            student.history.clear()
+            student.latest = {}
+            student.quiet_since = time.monotonic()
+            changed["online"] = True
+
+        rows = student.reader.read()
+        now = time.monotonic()
+        if len(rows):
+            student.quiet_since = now
+
+        # detection process exited, wait for the next one
+        if student.reader.closed:
+            student.reader.close()
+            student.reader = None
+            changed["online"] = False
+
+        # a crashed or replaced writer never sets closed, check while it is quiet
+        elif now - student.quiet_since > self.stale_seconds:
+            student.quiet_since = now
+            if student.reader.superseded():
+                student.reader.close()
+                student.reader = None
+                changed["online"] = False
+
+        if len(rows):
+            student.history.extend(rows)
+
+            for name, value in zip(SCORE_FIELDS, rows[-1].tolist()):
+                value = _json_value(value, self.precision)
+                if name not in student.latest or student.latest[name] != value:
+                    student.latest[name] = value
+                    changed[name] = value
+
+        return changed
+
+    def snapshot(self):
+        """
+        {student: latest scores and online}, what a new client starts from.
+        """
+
+        return {
+            student.name: dict(student.latest, online=student.online)
+            for student in self.students.values()
+        }
+
+    def history(self, name, seconds=None):
+        """
+        {field: [values]} of one student's scores, oldest first, limited to
+        the last seconds of media time. Raises KeyError for an unknown
+        student.
+        """
+
+        student = self.students[name]
+        count = len(student.history)
+
+        if seconds is not None and count:
+            timestamps = student.history.view(0)
+            start = np.searchsorted(timestamps, timestamps[-1] - seconds * 1000, side="left")
+            count -= start
+
+        return {
+            field: [_json_value(v, self.precision) for v in student.history.view(i, count).tolist()]
+            for i, field in enumerate(SCORE_FIELDS)
+        }
+
+    def close(self):
+        for student in self.students.values():
+            if student.reader is not None:
+                student.reader.close()
+                student.reader = None
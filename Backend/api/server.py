@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from face_detection.core.channel import CHANNEL_NAME, channel_name
+
+from .hub import Client, ScoreHub
+
+
+# RFC 6455 handshake key suffix
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_TEXT, _CLOSE, _PING, _PONG = 0x1, 0x8, 0x9, 0xA
+
+_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+# clients only send control frames, anything bigger is refused unread
+_MAX_PAYLOAD = 64 * 1024
+_CLOSE_TOO_BIG = 1009
+
+
+class _FrameTooLarge(Exception):
+    pass
+
+
+def _frame(opcode, payload=b""):
+    # server to client frames are never masked
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_frame(reader):
+    """
+    Returns (opcode, payload) of the next client frame. Raises
+    _FrameTooLarge for a payload over _MAX_PAYLOAD.
+    """
+
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+
+    if length > _MAX_PAYLOAD:
+        raise _FrameTooLarge(length)
+
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+    return first & 0x0F, payload
+
+
+class ScoreServer:
+    """
+    Local HTTP and WebSocket API over a ScoreHub, for the web dashboard.
+
+    GET /api/students                          latest scores of every student
+    GET /api/students/<name>/history?seconds=  recent scores as columns
+    GET /ws                                    live updates
+
+    A WebSocket client first gets {"type": "snapshot", "students": ...},
+    then {"type": "update", "students": ...} with only what changed. One
+    hub poll every interval seconds makes one batch for all students; a
+    client still sending the previous batch gets the merged updates once it
+    catches up, so slow clients never queue up memory or hold back others.
+    """
+
+    def __init__(self, hub, interval=0.1):
+        self.hub = hub
+        self.interval = interval
+
+    async def pump(self):
+        while True:
+            # one bad poll must not end the updates for every client
+            try:
+                self.hub.poll()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.interval)
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        lines = request.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            await self._respond(writer, 400, {"error": "bad request line"})
+            return
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+
+        if method != "GET":
+            await self._respond(writer, 405, {"error": "only GET is supported"})
+        elif parts == ["ws"] and headers.get("upgrade", "").lower() == "websocket":
+            await self._websocket(reader, writer, headers)
+        elif parts == ["api", "students"]:
+            await self._respond(writer, 200, self.hub.snapshot())
+        elif len(parts) == 4 and parts[:2] == ["api", "students"] and parts[3] == "history":
+            await self._history(writer, parts[2], parse_qs(url.query))
+        else:
+            await self._respond(writer, 404, {"error": f"no route for {url.path}"})
+
+    async def _history(self, writer, name, query):
+        seconds = None
+        if "seconds" in query:
+            try:
+                seconds = float(query["seconds"][0])
+            except ValueError:
+                await self._respond(writer, 400, {"error": "seconds must be a number"})
+                return
+
+        try:
+            history = self.hub.history(name, seconds)
+        except KeyError:
+            await self._respond(writer, 404, {"error": f"unknown student {name!r}"})
+            return
+
+        await self._respond(writer, 200, history)
+
+    async def _respond(self, writer, status, body):
+        payload = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_STATUS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            # the dashboard's dev server runs on another port
+            "Access-Control-Allow-Origin: *\r\n"
+            "Connection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if key is None:
+            await self._respond(writer, 400, {"error": "missing Sec-WebSocket-Key"})
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+
+        client = Client()
+        self.hub.clients.add(client)
+        sender = asyncio.ensure_future(self._send(writer, client))
+
+        try:
+            while True:
+                opcode, payload = await _read_frame(reader)
+                if opcode == _CLOSE:
+                    writer.write(_frame(_CLOSE, payload[:2]))
+                    break
+                if opcode == _PING:
+                    writer.write(_frame(_PONG, payload))
+                # anything the client sends is ignored
+        except _FrameTooLarge:
+            writer.write(_frame(_CLOSE, struct.pack("!H", _CLOSE_TOO_BIG)))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.hub.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send(self, writer, client):
+        try:
+            message = {"type": "snapshot", "students": self.hub.snapshot()}
+            while True:
+                writer.write(_frame(_TEXT, json.dumps(message).encode()))
+
+                # a slow client waits here while its updates are merged
+                await writer.drain()
+
+                message = {"type": "update", "students": await client.next()}
+        except ConnectionError:
+            pass
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Score API on http://{host}:{port}, students: {', '.join(self.hub.students)}")
+
+        pump = asyncio.ensure_future(self.pump())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            pump.cancel()
+            self.hub.close()
+
+
+def parse_channels(students, channels):
+    """
+    {student: channel} from --student names and --channel student=channel
+    specs. With neither, the single detection process's channel is served
+    as student "live".
+    """
+
+    mapping = {name: channel_name(name) for name in students}
+    for spec in channels:
+        name, sep, channel = spec.partition("=")
+        if not sep:
+            raise SystemExit(f"--channel expects student=channel, got {spec!r}")
+        mapping[name] = channel
+
+    return mapping or {"live": CHANNEL_NAME}
+
+
+def main():
+    """
+    Score API for the web dashboard.
+    Run from Backend: python -m api.server
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Serve live scores over HTTP and WebSocket on this machine."
+    )
+    parser.add_argument("--student", action="append", default=[],
+                        help="student published by classroom.py --publish, repeatable")
+    parser.add_argument("--channel", action="append", default=[],
+                        help="student=shared-memory channel, repeatable")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on, local only by default")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.1,
+                        help="seconds between update batches")
+    parser.add_argument("--history", type=int, default=9000,
+                        help="score rows kept per student for the history endpoint")
+    args = parser.parse_args()
+
+    hub = ScoreHub(parse_channels(args.student, args.channel), history=args.history)
+
+    try:
+        asyncio.run(ScoreServer(hub, args.interval).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
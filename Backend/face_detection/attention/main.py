@@ -1,108 +1,197 @@
 import cv2
-import os
 import time
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 
-from .utils import compute_head_yaw
+from core.calibration import Baselines
+from core.features import YAW, to_pixels, pixel_points, frame_features
+from core.landmarker import LandmarkStage
+from core.profiling import profiler
+from core.rates import WindowCounter
+from core.results import DetectorResult, NO_FACE, CALIBRATING
 
 
 class AttentionDetector:
-    def __init__(self, consec_frames=10, calibration_frames=40, deviation_threshold=0.30):
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "face_landmarker.task")
-        model_path = os.path.abspath(model_path)
+    FEATURES = ["yaw_ratio"]
 
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
-            num_faces=1
-        )
+    # what advance() reads on frames the scheduler does not score
+    TRACK_FEATURES = ["yaw_ratio"]
+
+    def __init__(self, consec_frames=10, calibration_frames=40, deviation_threshold=0.30,
+                 student_id=None, store=None, rate_window=60.0):
 
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+        # own landmark stage, only built when used standalone
+        self.stage = None
 
-        self.frame_count = 0
         self.turn_count = 0
+        # turns/min over the last rate_window seconds of media time
+        self.turn_window = WindowCounter(rate_window)
         self.last_direction = "CENTER"
         self.yaw_stable_frames = 0
         self.MIN_STABLE_FRAMES = consec_frames
-        self.start_time = time.time()
+        self.start_time = None
 
+        # saved baselines for student_id skip calibration
         self.calibration_frames = calibration_frames
-        self.calibration_count = 0
-        self.yaw_sum = 0
-        self.baseline_yaw = None
+        self.baselines = Baselines("attention", ["baseline_yaw"], calibration_frames,
+                                   student_id, store)
+        self.baseline_yaw = self.baselines["baseline_yaw"] if self.baselines.ready else None
         self.deviation_threshold = deviation_threshold
 
-    def process(self, frame):
+        # latest compute() output
+        self.result = DetectorResult(NO_FACE)
+
+    def compute(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Scores one frame from the shared landmark array. No drawing.
+        """
+
+        if not len(faces):
+            return self.step(None, timestamp_ms)
+
+        lap = profiler.lap()
+
+        features = frame_features.get(faces, frame_shape, self.FEATURES)
+        lap("attention.features")
+
+        self.step(features, timestamp_ms, faces[0])
+        lap("attention.logic")
+
+        return self.result
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+    def advance(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Keeps the turn debounce on every frame without scoring it, for
+        frames a DetectorScheduler skips. self.result is left as it was.
+        """
+
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
+
+        if len(faces) and self.baseline_yaw is not None:
+            features = frame_features.get(faces, frame_shape, self.TRACK_FEATURES)
+            self._turn(features["yaw_ratio"], now)
+
+    def _turn(self, yaw, now):
+        """
+        Head direction for yaw, counting a turn once a new side has held
+        for MIN_STABLE_FRAMES frames.
+        """
+
+        deviation = yaw - self.baseline_yaw
+
+        if deviation > self.deviation_threshold:
+            direction = "LEFT"
+        elif deviation < -self.deviation_threshold:
+            direction = "RIGHT"
+        else:
+            direction = "CENTER"
+
+        if direction != self.last_direction and direction != "CENTER":
+            self.yaw_stable_frames += 1
+
+            if self.yaw_stable_frames >= self.MIN_STABLE_FRAMES:
+                self.turn_count += 1
+                self.turn_window.add(now)
+                self.last_direction = direction
+                self.yaw_stable_frames = 0
+        else:
+            self.yaw_stable_frames = 0
 
-        result = self.landmarker.detect_for_video(mp_image, self.frame_count)
-        self.frame_count += 1
+        return direction
 
-        if result.face_landmarks:
-            landmarks = result.face_landmarks[0]
+    def step(self, features, timestamp_ms=None, landmarks=None):
+        """
+        Advances the detector by one frame of precomputed features, keyed as
+        in core.features.FEATURE_NAMES, or None for a frame without a face.
+        """
 
-            yaw_ratio, nose, left_cheek, right_cheek = compute_head_yaw(
-                landmarks, frame.shape
-            )
+        # frame timestamps drive the clock when given, wall clock otherwise
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
+
+        state = NO_FACE
+
+        if features is not None:
+            yaw = features["yaw_ratio"]
+            features = {"yaw": yaw}
 
             if self.baseline_yaw is None:
-                self.yaw_sum += yaw_ratio
-                self.calibration_count += 1
+                if self.baselines.add({"baseline_yaw": yaw}):
+                    self.baseline_yaw = self.baselines["baseline_yaw"]
 
-                cv2.putText(frame, "Calibrating...", (30, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                self.result = DetectorResult(CALIBRATING, features=features,
+                                             landmarks=landmarks, timestamp_ms=timestamp_ms)
+                return self.result
 
-                if self.calibration_count >= self.calibration_frames:
-                    self.baseline_yaw = self.yaw_sum / self.calibration_frames
+            state = self._turn(yaw, now)
+            features["baseline_yaw"] = self.baseline_yaw
 
-                return frame
+            # refine the baseline online with typical frames
+            self.baselines.add({"baseline_yaw": yaw})
+            self.baseline_yaw = self.baselines["baseline_yaw"]
 
-            deviation = yaw_ratio - self.baseline_yaw
+        elapsed_time = self.turn_window.elapsed(now, self.start_time)
+        turns_per_minute = (
+            self.turn_window.count(now) * 60 / elapsed_time
+            if elapsed_time > 0 else 0
+        )
 
-            if deviation > self.deviation_threshold:
-                direction = "LEFT"
-            elif deviation < -self.deviation_threshold:
-                direction = "RIGHT"
-            else:
-                direction = "CENTER"
+        self.result = DetectorResult(
+            state,
+            scores={"turn_count": self.turn_count, "turns_per_minute": turns_per_minute},
+            features=features or {},
+            landmarks=landmarks,
+            timestamp_ms=timestamp_ms
+        )
 
-            cv2.circle(frame, nose, 4, (0, 255, 255), -1)
-            cv2.circle(frame, left_cheek, 4, (255, 0, 0), -1)
-            cv2.circle(frame, right_cheek, 4, (255, 0, 0), -1)
+        return self.result
 
-            cv2.putText(frame, f"Yaw: {yaw_ratio:.2f}", (30, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    def render(self, frame, result):
+        """
+        Draws the overlay for a computed result onto frame.
+        """
 
-            cv2.putText(frame, f"Baseline: {self.baseline_yaw:.2f}", (30, 65),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        with profiler.stage("attention.overlay"):
+            if result.state == CALIBRATING:
+                cv2.putText(frame, "Calibrating...", (30, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                return frame
 
-            cv2.putText(frame, f"Direction: {direction}", (30, 95),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 255), 2)
+            if result.landmarks is not None:
+                points = to_pixels(result.landmarks, frame.shape)
+                nose, left_cheek, right_cheek = pixel_points(points, YAW)
 
-            if direction != self.last_direction and direction != "CENTER":
-                self.yaw_stable_frames += 1
+                cv2.circle(frame, nose, 4, (0, 255, 255), -1)
+                cv2.circle(frame, left_cheek, 4, (255, 0, 0), -1)
+                cv2.circle(frame, right_cheek, 4, (255, 0, 0), -1)
 
-                if self.yaw_stable_frames >= self.MIN_STABLE_FRAMES:
-                    self.turn_count += 1
-                    self.last_direction = direction
-                    self.yaw_stable_frames = 0
-            else:
-                self.yaw_stable_frames = 0
+                cv2.putText(frame, f"Yaw: {result.features['yaw']:.2f}", (30, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+
+                cv2.putText(frame, f"Baseline: {result.features['baseline_yaw']:.2f}", (30, 65),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
 
-        elapsed_time = time.time() - self.start_time
-        turns_per_minute = (self.turn_count * 60 / elapsed_time) if elapsed_time > 0 else 0
+                cv2.putText(frame, f"Direction: {result.state}", (30, 95),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 255), 2)
 
-        cv2.putText(frame, f"Turn Count: {self.turn_count}", (30, 130),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 0), 2)
+            cv2.putText(frame, f"Turn Count: {result.scores['turn_count']}", (30, 130),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 0), 2)
 
-        cv2.putText(frame, f"Turns/Min: {turns_per_minute:.2f}", (30, 160),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+            cv2.putText(frame, f"Turns/Min: {result.scores['turns_per_minute']:.2f}", (30, 160),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
 
         return frame
+
+    def process(self, frame, faces=None, timestamp_ms=None):
+        """
+        Standalone path: compute and render in one call.
+        """
+
+        if faces is None:
+            if self.stage is None:
+                self.stage = LandmarkStage()
+            faces = self.stage.process(frame, timestamp_ms)
+
+        return self.render(frame, self.compute(faces, frame.shape, timestamp_ms))
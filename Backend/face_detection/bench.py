@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from raw.cam import RawCameraView
+from raw.landmarks import LandmarkViewer
+from drowsiness.main import DrowsinessDetector
+from attention.main import AttentionDetector
+from stress.main import StressDetector
+from confusion.main import ConfusionDetector
+from core.dashboard import DashboardCompositor
+from core.features import compute_features, to_pixels
+from core.fixtures import synthetic_session
+from core.landmarker import LandmarkStage
+
+
+DETECTORS = {
+    "drowsiness": DrowsinessDetector,
+    "attention": AttentionDetector,
+    "stress": StressDetector,
+    "confusion": ConfusionDetector,
+}
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        out = fn(*args, **kwargs)
+        self.add(stage, time.perf_counter() - start)
+        return out
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def report(self):
+        report = {}
+        for stage, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            report[stage] = {
+                "mean": float(ms.mean()),
+                "p50": float(np.percentile(ms, 50)),
+                "p95": float(np.percentile(ms, 95)),
+                "p99": float(np.percentile(ms, 99)),
+            }
+        return report
+
+
+def load_frames(video, frames, width, height):
+    """
+    Frames from a video file, or synthetic gradient frames when no video is given.
+    """
+
+    if video is None:
+        x = np.linspace(0, 255, width, dtype=np.uint8)
+        base = np.dstack([np.tile(x, (height, 1))] * 3)
+        return [np.roll(base, i, axis=1) for i in range(frames)]
+
+    cap = cv2.VideoCapture(video)
+    out = []
+    while len(out) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        out.append(cv2.resize(frame, (width, height)))
+    cap.release()
+
+    if not out:
+        raise SystemExit(f"Could not read frames from {video}")
+
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(frames, landmarks):
+    """
+    Times every pipeline stage per frame.
+    Inference runs on the frames, detectors run on the canned landmarks so
+    their work does not depend on a face being in the video.
+    """
+
+    timer = StageTimer()
+    dashboard = DashboardCompositor()
+
+    # built up front, the landmarker is otherwise only created on the first process()
+    stage = LandmarkStage().load()
+    raw_view = RawCameraView()
+    landmark_view = LandmarkViewer()
+    detectors = {name: cls() for name, cls in DETECTORS.items()}
+
+    for i, frame in enumerate(frames):
+        faces = landmarks[i % len(landmarks)][None]
+        timestamp_ms = i * 1000 / 30
+        start = time.perf_counter()
+
+        rgb = timer.time("color", cv2.cvtColor, frame, cv2.COLOR_BGR2RGB)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        timer.time("inference", stage.landmarker.detect_for_video,
+                   mp_image, int(timestamp_ms))
+
+        timer.time("features", compute_features, to_pixels(faces, frame.shape))
+
+        results = {
+            name: timer.time(f"{name}.compute", detector.compute,
+                             faces, frame.shape, timestamp_ms)
+            for name, detector in detectors.items()
+        }
+
+        start_composite = time.perf_counter()
+        tiles = [dashboard.blit(slot, frame) for slot in range(6)]
+        timer.add("composite", time.perf_counter() - start_composite)
+
+        timer.time("raw.overlay", raw_view.process, tiles[0])
+        timer.time("landmarks.overlay", landmark_view.render, tiles[1], faces)
+        for tile, (name, detector) in zip(tiles[2:], detectors.items()):
+            timer.time(f"{name}.overlay", detector.render, tile, results[name])
+
+        timer.add("total", time.perf_counter() - start)
+
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection pipeline.")
+    parser.add_argument("--video", help="video file to read frames from (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames + args.warmup, args.width, args.height)
+    landmarks = synthetic_session(len(frames))
+
+    timer = run(frames, landmarks)
+
+    # drop warmup frames (model init, first allocations)
+    for stage in timer.samples:
+        timer.samples[stage] = timer.samples[stage][args.warmup:]
+
+    stages = timer.report()
+    fps = 1000 / stages["total"]["mean"]
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "source": args.video or "synthetic",
+        "frames": len(timer.samples["total"]),
+        "frame_size": [args.width, args.height],
+        "fps": fps,
+        "stages_ms": stages,
+    }
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':<32}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for stage, ms in stages.items():
+        print(f"{stage:<32}{ms['p50']:>9.3f}{ms['p95']:>9.3f}{ms['p99']:>9.3f}")
+    print(f"\n{fps:.1f} frames per second, results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from drowsiness.main import DrowsinessDetector
+from attention.main import AttentionDetector
+from stress.main import StressDetector
+from confusion.main import ConfusionDetector
+from core.calibration import CalibrationStore
+from core.capture import ThreadedCapture, LatencyMeter
+from core.channel import SCORE_FIELDS, ScoreWriter, channel_name
+from core.features import NO_FACES
+from core.landmarker import LandmarkStage
+from core.presence import PresenceStage
+from headless import SCORE_COLUMNS
+from multiface import MultiFaceScorer
+
+
+# one processed frame of one stream, sent back by a worker. faces is the
+# number of faces found, scores maps track ID to that face's scores (always
+# track 0 with one face per stream). captured_at is the capture's
+# time.monotonic(), work_seconds the time spent in the worker
+StreamResult = namedtuple("StreamResult", [
+    "stream", "index", "timestamp_ms", "faces", "scores", "captured_at", "work_seconds"
+])
+
+
+class StreamPipeline:
+    """
+    Everything one stream needs: presence gate, landmark stage and
+    detectors. Lives in the worker the stream is pinned to.
+
+    With num_faces > 1 the stream is a shared camera: every face is scored
+    with its own detector state by a MultiFaceScorer, on the full frame.
+    """
+
+    def __init__(self, student_id=None, store=None, num_faces=1):
+        self.stage = LandmarkStage(num_faces)
+        self.multi = MultiFaceScorer() if num_faces > 1 else None
+        self.presence = PresenceStage() if self.multi is None else None
+
+        # a shared camera's tracks calibrate afresh, track IDs are not students
+        self.detectors = []
+        if self.multi is None:
+            self.detectors = [
+                DrowsinessDetector(),
+                AttentionDetector(student_id=student_id, store=store),
+                StressDetector(student_id=student_id, store=store),
+                ConfusionDetector(student_id=student_id, store=store)
+            ]
+
+    def load(self):
+        if self.presence is not None:
+            self.presence.load()
+        self.stage.load()
+
+    def process(self, frame, timestamp_ms):
+        """
+        Returns (faces, {track_id: scores}) for one frame.
+        """
+
+        if self.multi is not None:
+            faces = self.stage.process(frame, timestamp_ms)
+            _, tracks = self.multi.compute(faces, frame.shape, timestamp_ms)
+            return len(faces), {
+                track_id: _score_columns(results) for track_id, results in tracks.items()
+            }
+
+        roi = self.presence.process(frame, timestamp_ms)
+        faces = NO_FACES if roi is None else self.stage.process(frame, timestamp_ms, roi)
+
+        results = [detector.compute(faces, frame.shape, timestamp_ms) for detector in self.detectors]
+        return len(faces), {0: _score_columns(results)}
+
+    def close(self):
+        # drowsiness keeps no baselines
+        for detector in self.detectors[1:]:
+            if detector.baselines.ready:
+                detector.baselines.save()
+
+
+def _score_columns(results):
+    scores = {}
+    for result in results:
+        scores.update(result.scores)
+
+    return {name: float(scores[name]) for name in SCORE_COLUMNS if scores.get(name) is not None}
+
+
+def _worker(inbox, outbox, ready, student_baselines, num_faces):
+    """
+    Worker process loop. Jobs are (stream, index, captured_at, timestamp_ms,
+    frame); a job with only a stream name opens that stream and reports on
+    ready once its models are built, a None frame closes it and a None job
+    ends the worker.
+    """
+
+    store = CalibrationStore() if student_baselines else None
+    pipelines = {}
+
+    while True:
+        job = inbox.get()
+        if job is None:
+            break
+
+        if isinstance(job, str):
+            pipeline = pipelines[job] = StreamPipeline(job if store else None, store, num_faces)
+            pipeline.load()
+            ready.put(job)
+            continue
+
+        stream, index, captured_at, timestamp_ms, frame = job
+
+        if frame is None:
+            pipeline = pipelines.pop(stream, None)
+            if pipeline is not None:
+                pipeline.close()
+            continue
+
+        start = time.perf_counter()
+        faces, scores = pipelines[stream].process(frame, timestamp_ms)
+
+        outbox.put(StreamResult(stream, index, timestamp_ms, faces, scores,
+                                captured_at, time.perf_counter() - start))
+
+    for pipeline in pipelines.values():
+        pipeline.close()
+
+
+class Stream:
+    """
+    Dispatcher-side state of one source: its capture thread, the worker it
+    is pinned to and its counters.
+    """
+
+    def __init__(self, name, source, worker, pace=True):
+        self.name = name
+        self.source = source
+        self.worker = worker
+        self.capture = ThreadedCapture(source, pace=pace)
+
+        self.start_time = None
+        self.in_flight = 0
+        self.processed = 0
+        self.done = False
+
+        self.latency = LatencyMeter()
+        self.work_ms = deque(maxlen=120)
+
+    def stats(self):
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0
+
+        return {
+            "read": self.capture.frames_read,
+            "processed": self.processed,
+            "dropped": self.capture.frames_dropped,
+            "fps": self.processed / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": self.latency.average(),
+            "latency_worst_ms": self.latency.worst(),
+            "work_ms": float(np.mean(self.work_ms)) if self.work_ms else 0.0,
+        }
+
+
+class IngestServer:
+    """
+    Scores N concurrent sources (video files or camera indices) on a pool of
+    worker processes.
+
+    Each stream is pinned to one worker (round-robin by order), so its
+    landmarker timestamps, calibration and detector state never leave that
+    process. The dispatcher visits streams round-robin, starting one later
+    each pass, and lets every stream have at most max_in_flight frames
+    queued or in inference. A stream whose worker is saturated keeps only
+    its newest captured frame; the ones it replaces are dropped and counted.
+
+    num_faces > 1 scores up to that many students per source.
+    """
+
+    def __init__(self, sources, workers=None, max_in_flight=1, pace=True,
+                 student_baselines=False, num_faces=1):
+        self.workers = min(workers or os.cpu_count(), len(sources))
+        self.max_in_flight = max_in_flight
+        self.pace = pace
+        self.student_baselines = student_baselines
+        self.num_faces = num_faces
+
+        self.sources = sources
+        self.streams = []
+        self.inboxes = []
+        self.processes = []
+        self.outbox = None
+        self.turn = 0
+        self.start_time = None
+
+    def start(self, timeout=60):
+        """
+        Starts the workers, waits until every stream's models are built in
+        its worker, then starts the captures so no frame waits on start-up.
+        """
+
+        # workers first, so they are not forked with capture threads running
+        self.outbox = multiprocessing.Queue()
+        ready = multiprocessing.Queue()
+        for _ in range(self.workers):
+            inbox = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_worker, args=(inbox, self.outbox, ready, self.student_baselines, self.num_faces),
+                daemon=True
+            )
+            process.start()
+            self.inboxes.append(inbox)
+            self.processes.append(process)
+
+        for i, (name, source) in enumerate(self.sources.items()):
+            stream = Stream(name, source, i % self.workers, self.pace)
+            self.inboxes[stream.worker].put(name)
+            self.streams.append(stream)
+
+        for _ in self.streams:
+            ready.get(timeout=timeout)
+
+        self.start_time = time.monotonic()
+        for stream in self.streams:
+            stream.start_time = self.start_time
+            stream.capture.start()
+
+        return self
+
+    @property
+    def done(self):
+        return all(stream.done for stream in self.streams)
+
+    def run(self, duration=None, on_result=None, report_every=None):
+        """
+        Dispatches frames and collects results until every source has ended
+        or duration seconds have passed. on_result gets every StreamResult;
+        report_every prints the stats table at that interval in seconds.
+        """
+
+        deadline = None if duration is None else time.monotonic() + duration
+        last_report = time.monotonic()
+
+        while not self.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+            dispatched = self._dispatch()
+
+            # nothing to send: wait a little for a result instead of spinning
+            self._collect(on_result, wait=0 if dispatched else 0.005)
+
+            if report_every and time.monotonic() - last_report >= report_every:
+                last_report = time.monotonic()
+                print("\n".join(format_stats(self.stats())))
+
+    def _dispatch(self):
+        count = len(self.streams)
+        order = self.streams[self.turn:] + self.streams[:self.turn]
+        self.turn = (self.turn + 1) % count
+
+        sent = 0
+        for stream in order:
+            if stream.done or stream.in_flight >= self.max_in_flight:
+                continue
+
+            captured = stream.capture.read(timeout=0)
+            if captured is None:
+                if stream.capture.ended and not stream.in_flight:
+                    self._end(stream)
+                continue
+
+            timestamp_ms = (captured.timestamp - stream.start_time) * 1000
+            self.inboxes[stream.worker].put(
+                (stream.name, captured.index, captured.timestamp, timestamp_ms, captured.frame)
+            )
+            stream.in_flight += 1
+            sent += 1
+
+        return sent
+
+    def _collect(self, on_result=None, wait=0):
+        streams = {stream.name: stream for stream in self.streams}
+
+        while True:
+            try:
+                result = self.outbox.get(timeout=wait) if wait else self.outbox.get_nowait()
+            except queue.Empty:
+                return
+
+            # only the first get waits
+            wait = 0
+
+            stream = streams[result.stream]
+            stream.in_flight -= 1
+            stream.processed += 1
+            stream.latency.record(result.captured_at)
+            stream.work_ms.append(result.work_seconds * 1000)
+
+            if on_result is not None:
+                on_result(result)
+
+    def _end(self, stream):
+        stream.done = True
+        stream.capture.release()
+        self.inboxes[stream.worker].put((stream.name, None, None, None, None))
+
+    def stats(self):
+        """
+        Per-stream counters, rates and latencies, plus "total" over all streams.
+        """
+
+        stats = {stream.name: stream.stats() for stream in self.streams}
+
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0
+        processed = sum(s["processed"] for s in stats.values())
+        stats["total"] = {
+            "read": sum(s["read"] for s in stats.values()),
+            "processed": processed,
+            "dropped": sum(s["dropped"] for s in stats.values()),
+            "fps": processed / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": float(np.mean([s["latency_ms"] for s in stats.values()])) if stats else 0.0,
+            "latency_worst_ms": max((s["latency_worst_ms"] for s in stats.values()), default=0.0),
+            "work_ms": float(np.mean([s["work_ms"] for s in stats.values()])) if stats else 0.0,
+        }
+
+        return stats
+
+    def stop(self):
+        # results still on the way are discarded
+        for stream in self.streams:
+            if not stream.done:
+                self._end(stream)
+
+        for inbox in self.inboxes:
+            inbox.put(None)
+
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def format_stats(stats):
+    lines = [f"{'stream':<16}{'read':>8}{'done':>8}{'drop':>8}{'fps':>8}"
+             f"{'lat ms':>9}{'worst':>9}{'work ms':>9}"]
+
+    for name, s in stats.items():
+        lines.append(f"{name:<16}{s['read']:>8}{s['processed']:>8}{s['dropped']:>8}"
+                     f"{s['fps']:>8.1f}{s['latency_ms']:>9.1f}{s['latency_worst_ms']:>9.1f}"
+                     f"{s['work_ms']:>9.1f}")
+
+    return lines
+
+
+def parse_sources(specs):
+    """
+    [name=]source entries; a source of digits is a camera index. Names
+    default to the file name or cam<index>.
+    """
+
+    sources = {}
+    for spec in specs:
+        name, _, source = spec.rpartition("=")
+
+        if source.isdigit():
+            source = int(source)
+            name = name or f"cam{source}"
+        else:
+            name = name or os.path.splitext(os.path.basename(source))[0]
+
+        unique, n = name, 2
+        while unique in sources:
+            unique, n = f"{name}-{n}", n + 1
+        sources[unique] = source
+
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score several student streams at once on a worker pool."
+    )
+    parser.add_argument("sources", nargs="+",
+                        help="[name=]video file or camera index, one per student")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes, streams are spread over them")
+    parser.add_argument("--max-in-flight", type=int, default=1,
+                        help="frames per stream queued or in inference at once")
+    parser.add_argument("--no-pace", action="store_true",
+                        help="read video files as fast as possible, not at their frame rate")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="stop after this many seconds")
+    parser.add_argument("--report-every", type=float, default=5.0,
+                        help="seconds between stats tables")
+    parser.add_argument("--faces", type=int, default=1,
+                        help="faces scored per source, for a camera shared by several students")
+    parser.add_argument("--student-baselines", action="store_true",
+                        help="use and save calibration baselines under each stream name")
+    parser.add_argument("--out", default=None,
+                        help="directory for per-stream score CSVs")
+    parser.add_argument("--publish", action="store_true",
+                        help="write each student's scores to its own channel for the score API")
+    args = parser.parse_args()
+
+    if args.student_baselines and args.faces > 1:
+        parser.error("--student-baselines needs one student per stream, not --faces > 1")
+
+    sources = parse_sources(args.sources)
+
+    files = {}
+    writers = {}
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for name in sources:
+            files[name] = open(os.path.join(args.out, f"{name}.csv"), "w", newline="")
+            writers[name] = csv.writer(files[name])
+            writers[name].writerow(["frame", "timestamp_ms", "faces", "track"] + SCORE_COLUMNS)
+
+    def write(result):
+        for track_id, scores in sorted(result.scores.items()):
+            writers[result.stream].writerow(
+                [result.index, f"{result.timestamp_ms:.1f}", result.faces, track_id] +
+                [scores.get(name, "") for name in SCORE_COLUMNS]
+            )
+
+    # one channel per student: the stream, or stream-track on a shared camera
+    publishers = {}
+
+    def publish(result):
+        for track_id, scores in result.scores.items():
+            student = result.stream if args.faces == 1 else f"{result.stream}-{track_id}"
+            if student not in publishers:
+                publishers[student] = ScoreWriter(channel_name(student))
+
+            publishers[student].write([result.timestamp_ms] + [
+                scores.get(name, np.nan) for name in SCORE_FIELDS[1:]
+            ])
+
+    handlers = ([write] if writers else []) + ([publish] if args.publish else [])
+
+    def on_result(result):
+        for handler in handlers:
+            handler(result)
+
+    server = IngestServer(sources, args.workers, args.max_in_flight,
+                          pace=not args.no_pace, student_baselines=args.student_baselines,
+                          num_faces=args.faces)
+    server.start()
+
+    try:
+        server.run(args.duration, on_result if handlers else None, args.report_every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        for f in files.values():
+            f.close()
+        for publisher in publishers.values():
+            publisher.close()
+
+    print("\n".join(format_stats(server.stats())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,150 @@
 import cv2
-import os
 import time
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-
-from .utils import (
-    compute_brow_metrics,
-    compute_head_tilt,
-    compute_ear,
-    compute_yaw_ratio
+
+from core.calibration import Baselines
+from core.features import (
+    LEFT_EYE,
+    RIGHT_EYE,
+    BROWS,
+    TILT,
+    YAW,
+    to_pixels,
+    pixel_points,
+    frame_features
 )
+from core.landmarker import LandmarkStage
+from core.profiling import profiler
+from core.rates import WindowCounter
+from core.results import DetectorResult, NO_FACE, CALIBRATING
 
 class ConfusionDetector:
 
-    def __init__(self, calibration_frames=60):
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "face_landmarker.task")
-        model_path = os.path.abspath(model_path)
+    FEATURES = [
+        "brow_compression", "brow_drop", "brow_asymmetry",
+        "head_tilt", "ear", "yaw_ratio"
+    ]
 
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
-            num_faces=1
-        )
+    # what advance() reads on frames the scheduler does not score
+    TRACK_FEATURES = ["yaw_ratio"]
 
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+    def __init__(self, calibration_frames=60, student_id=None, store=None,
+                 weights=(0.30, 0.15, 0.20, 0.20, 0.15), rate_window=60.0):
 
-        self.frame_count = 0
+        # own landmark stage, only built when used standalone
+        self.stage = None
 
-        # calibration
+        # calibration, saved baselines for student_id skip it
         self.calibration_frames = calibration_frames
-        self.calib_count = 0
-
-        self.raise_sum = 0
-        self.inward_sum = 0
-        self.ear_sum = 0
+        self.baselines = Baselines(
+            "confusion", ["baseline_raise", "baseline_inward", "baseline_ear"],
+            calibration_frames, student_id, store
+        )
 
         self.baseline_raise = None
         self.baseline_inward = None
         self.baseline_ear = None
+        if self.baselines.ready:
+            self._update_baselines()
+
+        # inward brow, asymmetry, tilt, squint and side glance weights
+        self.weights = weights
 
         # side glance stability
         self.last_yaw = 1
         self.yaw_change_count = 0
-        self.start_time = time.time()
+        self.start_time = None
 
-    def process(self, frame):
+        # side glances/s over the last rate_window seconds of media time
+        self.yaw_window = WindowCounter(rate_window)
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        # latest compute() output
+        self.result = DetectorResult(NO_FACE)
 
-        result = self.landmarker.detect_for_video(mp_image, self.frame_count)
-        self.frame_count += 1
+    def compute(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Scores one frame from the shared landmark array. No drawing.
+        """
 
-        if not result.face_landmarks:
-            return frame
+        if not len(faces):
+            return self.step(None, timestamp_ms)
 
-        landmarks = result.face_landmarks[0]
+        lap = profiler.lap()
 
-        raise_val, asymmetry, inward_dist, brow_pts = compute_brow_metrics(landmarks, frame.shape)
-        tilt_angle, tilt_pts = compute_head_tilt(landmarks, frame.shape)
-        ear, eye_pts = compute_ear(landmarks, frame.shape)
-        yaw_ratio, yaw_pts = compute_yaw_ratio(landmarks, frame.shape)
+        features = frame_features.get(faces, frame_shape, self.FEATURES)
+        lap("confusion.features")
 
-        if self.baseline_raise is None:
+        self.step(features, timestamp_ms, faces[0])
+        lap("confusion.logic")
 
-            self.raise_sum += raise_val
-            self.inward_sum += inward_dist
-            self.ear_sum += ear
-            self.calib_count += 1
+        return self.result
 
-            cv2.putText(frame, "Calibrating Confusion...", (30, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+    def advance(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Keeps counting side glances against the previous frame without
+        scoring, for frames a DetectorScheduler skips. self.result is left
+        as it was.
+        """
 
-            if self.calib_count >= self.calibration_frames:
-                self.baseline_raise = self.raise_sum / self.calibration_frames
-                self.baseline_inward = self.inward_sum / self.calibration_frames
-                self.baseline_ear = self.ear_sum / self.calibration_frames
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
 
-            return frame
+        if len(faces) and self.baseline_raise is not None:
+            features = frame_features.get(faces, frame_shape, self.TRACK_FEATURES)
+            self._glance(features["yaw_ratio"], now)
+
+    def _glance(self, yaw, now):
+        if abs(yaw - self.last_yaw) > 0.08:
+            self.yaw_change_count += 1
+            self.yaw_window.add(now)
+
+        self.last_yaw = yaw
+
+    def step(self, features, timestamp_ms=None, landmarks=None):
+        """
+        Advances the detector by one frame of precomputed features, keyed as
+        in core.features.FEATURE_NAMES, or None for a frame without a face.
+        """
+
+        # frame timestamps drive the clock when given, wall clock otherwise
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
+
+        if features is None:
+            self.result = DetectorResult(NO_FACE, timestamp_ms=timestamp_ms)
+            return self.result
+
+        raise_val = features["brow_compression"]
+        asymmetry = features["brow_drop"]
+        inward_dist = features["brow_asymmetry"]
+        tilt_angle = features["head_tilt"]
+        ear = features["ear"]
+        yaw = features["yaw_ratio"]
+
+        features = {
+            "brow_compression": raise_val,
+            "brow_drop": asymmetry,
+            "brow_asymmetry": inward_dist,
+            "head_tilt": tilt_angle,
+            "ear": ear,
+            "yaw_ratio": yaw
+        }
+
+        calibration = {
+            "baseline_raise": raise_val,
+            "baseline_inward": inward_dist,
+            "baseline_ear": ear
+        }
+
+        if self.baseline_raise is None:
+
+            if self.baselines.add(calibration):
+                self._update_baselines()
+
+            self.result = DetectorResult(CALIBRATING, features=features,
+                                         landmarks=landmarks, timestamp_ms=timestamp_ms)
+            return self.result
 
         raise_score = max(0, (raise_val - self.baseline_raise) / self.baseline_raise) * 100
         raise_score = min(100, raise_score)
@@ -98,39 +161,93 @@ class ConfusionDetector:
         else:
             squint_score = 0
 
-        if abs(yaw_ratio - self.last_yaw) > 0.08:
-            self.yaw_change_count += 1
-
-        self.last_yaw = yaw_ratio
+        self._glance(yaw, now)
 
-        elapsed = time.time() - self.start_time
-        yaw_rate = self.yaw_change_count / elapsed if elapsed > 0 else 0
+        elapsed = self.yaw_window.elapsed(now, self.start_time)
+        yaw_rate = self.yaw_window.count(now) / elapsed if elapsed > 0 else 0
         yaw_score = min(100, yaw_rate * 40)
 
+        w_inward, w_asymmetry, w_tilt, w_squint, w_yaw = self.weights
         confusion_score = (
-            0.30 * inward_score +
-            0.15 * asymmetry_score +
-            0.20 * tilt_score +
-            0.20 * squint_score +
-            0.15 * yaw_score
+            w_inward * inward_score +
+            w_asymmetry * asymmetry_score +
+            w_tilt * tilt_score +
+            w_squint * squint_score +
+            w_yaw * yaw_score
         )
 
         confusion_score = min(100, confusion_score)
 
-        # ---------- DRAW ----------
-        for p in brow_pts:
-            cv2.circle(frame, p, 4, (255, 0, 0), -1)
+        features["baseline_raise"] = self.baseline_raise
+        features["baseline_inward"] = self.baseline_inward
+        features["baseline_ear"] = self.baseline_ear
+
+        # refine the baselines online with typical frames
+        self.baselines.add(calibration)
+        self._update_baselines()
+
+        self.result = DetectorResult(
+            "SCORED",
+            scores={"confusion_score": confusion_score, "yaw_rate": yaw_rate},
+            features=features,
+            landmarks=landmarks,
+            timestamp_ms=timestamp_ms
+        )
+
+        return self.result
+
+    def _update_baselines(self):
+        self.baseline_raise = self.baselines["baseline_raise"]
+        self.baseline_inward = self.baselines["baseline_inward"]
+        self.baseline_ear = self.baselines["baseline_ear"]
+
+    def render(self, frame, result):
+        """
+        Draws the overlay for a computed result onto frame.
+        """
+
+        if result.landmarks is None:
+            return frame
+
+        with profiler.stage("confusion.overlay"):
+            if result.state == CALIBRATING:
+                cv2.putText(frame, "Calibrating Confusion...", (30, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                return frame
+
+            # ---------- DRAW ----------
+            points = to_pixels(result.landmarks, frame.shape)
+
+            brow_pts = pixel_points(points, BROWS)
+            tilt_pts = pixel_points(points, TILT)
+            eye_pts = pixel_points(points, LEFT_EYE + RIGHT_EYE)
+            yaw_pts = pixel_points(points, YAW)
 
-        for p in eye_pts:
-            cv2.circle(frame, p, 3, (0, 255, 0), -1)
+            for p in brow_pts:
+                cv2.circle(frame, p, 4, (255, 0, 0), -1)
 
-        for p in yaw_pts:
-            cv2.circle(frame, p, 4, (0, 255, 255), -1)
+            for p in eye_pts:
+                cv2.circle(frame, p, 3, (0, 255, 0), -1)
 
-        for p in tilt_pts:
-            cv2.circle(frame, p, 4, (255, 0, 255), -1)
+            for p in yaw_pts:
+                cv2.circle(frame, p, 4, (0, 255, 255), -1)
 
-        cv2.putText(frame, f"Confusion: {confusion_score:.0f}/100", (30, 70),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 255), 3)
+            for p in tilt_pts:
+                cv2.circle(frame, p, 4, (255, 0, 255), -1)
+
+            cv2.putText(frame, f"Confusion: {result.scores['confusion_score']:.0f}/100", (30, 70),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 255), 3)
 
         return frame
+
+    def process(self, frame, faces=None, timestamp_ms=None):
+        """
+        Standalone path: compute and render in one call.
+        """
+
+        if faces is None:
+            if self.stage is None:
+                self.stage = LandmarkStage()
+            faces = self.stage.process(frame, timestamp_ms)
+
+        return self.render(frame, self.compute(faces, frame.shape, timestamp_ms))
@@ -0,0 +1,228 @@
+import json
+import math
+import os
+import re
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_DIR = os.path.abspath(os.path.join(current_dir, "..", "calibration"))
+
+
+class RunningStat:
+    """
+    O(1) running mean and variance (Welford).
+
+    Once count reaches max_count the oldest samples fade out at rate
+    1/max_count, so a long session keeps adapting instead of freezing.
+    """
+
+    __slots__ = ("count", "mean", "m2", "max_count")
+
+    def __init__(self, max_count=1800, count=0, mean=0.0, m2=0.0):
+        self.max_count = max_count
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count = min(self.count + 1, self.max_count)
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        # keep m2 consistent with a window of max_count samples
+        if self.count == self.max_count:
+            self.m2 *= 1 - 1 / self.max_count
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count > 1 else 0.0
+
+    def is_typical(self, value, k=3.0):
+        """
+        True when value lies within k standard deviations of the mean, used
+        to keep expressive frames out of online refinement.
+        """
+
+        return abs(value - self.mean) <= k * self.std
+
+    def to_dict(self):
+        return {"count": int(self.count), "mean": float(self.mean), "m2": float(self.m2)}
+
+    @classmethod
+    def from_dict(cls, data, max_count=1800):
+        return cls(max_count, min(int(data["count"]), max_count),
+                   float(data["mean"]), float(data["m2"]))
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    Exclusive lock on path + ".lock", held across processes.
+    """
+
+    with open(path + ".lock", "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CalibrationStore:
+    """
+    Saves per-student baselines as one JSON file per student:
+    {detector: {baseline name: RunningStat fields}}.
+
+    Several processes may save the same student, e.g. headless --workers
+    or classroom --student-baselines: each save holds a lock on the file
+    while it reads, updates and replaces it, so no detector's entry is
+    lost. Two processes saving the same detector for the same student
+    still replace each other's entry, the last save wins.
+    """
+
+    def __init__(self, directory=CALIBRATION_DIR):
+        self.directory = directory
+
+    def path(self, student_id):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(student_id))
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def load(self, student_id, detector):
+        """
+        Returns {baseline name: RunningStat} saved for detector, or {}.
+        """
+
+        path = self.path(student_id)
+        if not os.path.exists(path):
+            return {}
+
+        with open(path) as f:
+            saved = json.load(f).get(detector, {})
+
+        return {name: RunningStat.from_dict(data) for name, data in saved.items()}
+
+    def save(self, student_id, detector, stats):
+        """
+        Writes the RunningStats of one detector, keeping the other detectors'.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(student_id)
+
+        with _file_lock(path):
+            data = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    data = json.load(f)
+
+            data[detector] = {name: stat.to_dict() for name, stat in stats.items()}
+
+            # write then rename, a crash never leaves a half-written file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+
+
+class Baselines:
+    """
+    Calibration state of one detector.
+
+    The first calibration_frames samples set the baselines. After that,
+    typical samples keep refining them online. With a student_id and a
+    store, saved baselines are loaded up front so a returning student
+    skips calibration, and finished baselines are saved back.
+    """
+
+    def __init__(self, detector, names, calibration_frames,
+                 student_id=None, store=None, refine=True):
+        self.detector = detector
+        self.calibration_frames = calibration_frames
+        self.student_id = student_id
+        self.store = store
+        self.refine = refine
+
+        self.stats = {name: RunningStat() for name in names}
+        if store is not None and student_id is not None:
+            saved = store.load(student_id, detector)
+            self.stats.update({name: saved[name] for name in names if name in saved})
+
+    @property
+    def ready(self):
+        return all(stat.count >= self.calibration_frames for stat in self.stats.values())
+
+    @property
+    def count(self):
+        return min(stat.count for stat in self.stats.values())
+
+    def __getitem__(self, name):
+        return self.stats[name].mean
+
+    def add(self, values):
+        """
+        Feeds one frame of {baseline name: value}. Returns True when the
+        baselines are ready.
+        """
+
+        if not self.ready:
+            for name, value in values.items():
+                self.stats[name].add(value)
+
+            if self.ready:
+                self.save()
+            return self.ready
+
+        if self.refine:
+            for name, value in values.items():
+                stat = self.stats[name]
+                if stat.is_typical(value):
+                    stat.add(value)
+
+        return True
+
+    def save(self):
+        if self.store is not None and self.student_id is not None:
+            self.store.save(self.student_id, self.detector, self.stats)
+
+
+def baseline_series(values, calibration_frames):
+    """
+    Runs Baselines over a whole series of {baseline name: values}, one
+    value per face frame. Returns {baseline name: array} holding, for every
+    frame from calibration_frames on, the baseline that frame is scored
+    against, before the frame refines it.
+    """
+
+    names = list(values)
+    baselines = Baselines(None, names, calibration_frames)
+
+    frames = len(values[names[0]])
+    series = {name: np.empty(max(0, frames - calibration_frames)) for name in names}
+
+    for i, frame in enumerate(zip(*(values[name] for name in names))):
+        if i >= calibration_frames:
+            for name in names:
+                series[name][i - calibration_frames] = baselines[name]
+        baselines.add(dict(zip(names, frame)))
+
+    return series
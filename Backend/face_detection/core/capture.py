@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+
+# timestamp is time.monotonic() right after the frame was read
+CapturedFrame = namedtuple("CapturedFrame", ["frame", "index", "timestamp"])
+
+
+class ThreadedCapture:
+    """
+    Reads cv2.VideoCapture on its own thread into a small bounded buffer.
+    read() always hands out the newest frame; older ones are dropped and counted.
+
+    pace=True reads a video file at its own frame rate instead of as fast as
+    possible, so it behaves like a live camera.
+    """
+
+    def __init__(self, source=0, buffer_size=1, pace=False):
+        self.cap = cv2.VideoCapture(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.pace = pace
+        self.buffer = deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+        return self
+
+    def _reader(self):
+        start = time.monotonic()
+
+        try:
+            while self.running:
+                if self.pace:
+                    delay = start + self.frames_read / self.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                ret, frame = self.cap.read()
+                timestamp = time.monotonic()
+
+                with self.condition:
+                    if not ret:
+                        break
+
+                    # a full buffer means the oldest frame is never processed
+                    if len(self.buffer) == self.buffer.maxlen:
+                        self.frames_dropped += 1
+
+                    self.buffer.append(CapturedFrame(frame, self.frames_read, timestamp))
+                    self.frames_read += 1
+                    self.condition.notify()
+        finally:
+            # released on this thread, so never while cap.read() is still running
+            self.cap.release()
+
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+
+    @property
+    def ended(self):
+        """
+        True once the source has no more frames and the last one was read.
+        """
+
+        return not self.running and not self.buffer
+
+    def read(self, timeout=None):
+        """
+        Waits for the newest frame.
+        Returns None once the source has ended or the timeout expires;
+        timeout=0 only takes a frame that is already waiting.
+        """
+
+        with self.condition:
+            while not self.buffer and self.running:
+                if not self.condition.wait(timeout):
+                    return None
+
+            if not self.buffer:
+                return None
+
+            captured = self.buffer.pop()
+            self.frames_dropped += len(self.buffer)
+            self.buffer.clear()
+
+            return captured
+
+    def release(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.thread is None:
+            self.cap.release()
+        else:
+            # a reader stuck in cap.read() releases the capture once it returns
+            self.thread.join(timeout=1)
+
+
+class LatencyMeter:
+    """
+    Rolling capture-to-display latency in milliseconds.
+    """
+
+    def __init__(self, window=120):
+        self.samples = deque(maxlen=window)
+
+    def record(self, capture_timestamp):
+        latency_ms = (time.monotonic() - capture_timestamp) * 1000
+        self.samples.append(latency_ms)
+        return latency_ms
+
+    def average(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def worst(self):
+        return max(self.samples) if self.samples else 0.0
@@ -0,0 +1,228 @@
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+CHANNEL_NAME = "cognitivelens_scores"
+
+# one row per frame, NaN when the detector had no value
+SCORE_FIELDS = ["timestamp_ms", "sleepy", "turns_per_minute", "stress_score", "confusion_score"]
+
+# header slots, int64. _SESSION is random per writer, so a reader can tell
+# a new writer under the same name from the one it attached to
+_WRITTEN, _CAPACITY, _FIELDS, _CLOSED, _PID, _SESSION = range(6)
+_HEADER = 8
+
+
+def channel_name(student):
+    """
+    Channel of one student when several are scored at once, e.g. by
+    classroom.py --publish.
+    """
+
+    return f"{CHANNEL_NAME}_{student}"
+
+
+def _process_alive(pid):
+    if os.name == "nt":
+        # segments do not outlive their last handle on Windows, so one
+        # that still exists has a live writer (os.kill would terminate it)
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_stale(name):
+    """
+    Unlinks a segment left behind by a writer that exited without close().
+    Raises RuntimeError if its writer is still running.
+    """
+
+    try:
+        existing = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+
+    pid = closed = 0
+    if existing.size >= _HEADER * 8:
+        header = np.ndarray(_HEADER, dtype=np.int64, buffer=existing.buf)
+        pid, closed = int(header[_PID]), int(header[_CLOSED])
+        del header
+
+    if pid and not closed and _process_alive(pid):
+        # not ours to unlink, keep the resource tracker away from it too
+        resource_tracker.unregister(existing._name, "shared_memory")
+        existing.close()
+        raise RuntimeError(f"Score channel {name} is in use by process {pid}")
+
+    existing.close()
+    existing.unlink()
+
+
+class ScoreWriter:
+    """
+    Single-producer side of the score channel.
+
+    Scores go into a float64 ring in shared memory, then the written counter
+    in the header is bumped. Writing is a plain memory store, no locks,
+    pickling or syscalls, so the detection loop never waits on the reader.
+    """
+
+    def __init__(self, name=CHANNEL_NAME, capacity=4096, fields=SCORE_FIELDS):
+        size = (_HEADER + capacity * len(fields)) * 8
+
+        # a crashed run can leave the segment behind
+        _remove_stale(name)
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.header = np.ndarray(_HEADER, dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity, len(fields)), dtype=np.float64,
+                               buffer=self.shm.buf, offset=_HEADER * 8)
+
+        # capacity last, readers treat a segment without it as not ready
+        self.header[:] = 0
+        self.header[_PID] = os.getpid()
+        self.header[_SESSION] = int.from_bytes(os.urandom(7), "little")
+        self.header[_FIELDS] = len(fields)
+        self.header[_CAPACITY] = capacity
+
+        self.capacity = capacity
+        self.fields = fields
+        self.written = 0
+
+    def write(self, values):
+        """
+        Appends one row. values is a sequence in fields order.
+        """
+
+        self.data[self.written % self.capacity] = values
+
+        # publish only after the row is complete
+        self.written += 1
+        self.header[_WRITTEN] = self.written
+
+    def write_results(self, timestamp_ms, results):
+        """
+        Appends one row from a frame's DetectorResults.
+        """
+
+        scores = {}
+        for result in results:
+            scores.update(result.scores)
+
+        self.write([timestamp_ms] + [
+            float(scores[name]) if scores.get(name) is not None else np.nan
+            for name in self.fields[1:]
+        ])
+
+    def close(self):
+        # tell the reader to drop this segment and wait for the next writer
+        self.header[_CLOSED] = 1
+
+        del self.header, self.data
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ScoreReader:
+    """
+    Single-consumer side of the score channel, polled from another process.
+    read() returns every row written since the last call. If the writer has
+    lapped the reader, only the newest capacity rows are returned. Once
+    closed is set the writer has gone and a new reader must be attached.
+    A writer that dies without closing is caught by superseded().
+    """
+
+    def __init__(self, name=CHANNEL_NAME):
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name)
+
+        # the segment belongs to the writer; without this the reader's
+        # resource tracker would unlink it when the GUI exits
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        self.header = np.ndarray(_HEADER, dtype=np.int64, buffer=self.shm.buf)
+
+        self.capacity = int(self.header[_CAPACITY])
+        self.data = np.ndarray((self.capacity, int(self.header[_FIELDS])),
+                               dtype=np.float64, buffer=self.shm.buf, offset=_HEADER * 8)
+
+        self.read_count = 0
+        self.rows_lost = 0
+
+    @classmethod
+    def attach(cls, name=CHANNEL_NAME):
+        """
+        Returns a reader, or None while the writer has not started.
+        """
+
+        try:
+            reader = cls(name)
+        except FileNotFoundError:
+            return None
+
+        # caught between the writer creating and initializing the segment
+        if reader.capacity == 0:
+            reader.close()
+            return None
+
+        return reader
+
+    @property
+    def closed(self):
+        return bool(self.header[_CLOSED])
+
+    @property
+    def session(self):
+        return int(self.header[_SESSION])
+
+    def superseded(self):
+        """
+        True when the writer went away without closing the channel: its
+        process is gone, or a new writer replaced the segment under the same
+        name. Attaches a second time, so only check once read() has come
+        back empty for a while.
+        """
+
+        if not _process_alive(int(self.header[_PID])):
+            return True
+
+        fresh = ScoreReader.attach(self.name)
+        if fresh is None:
+            return True
+
+        try:
+            return fresh.session != self.session
+        finally:
+            fresh.close()
+
+    def read(self):
+        written = int(self.header[_WRITTEN])
+
+        start = max(self.read_count, written - self.capacity)
+        self.rows_lost += start - self.read_count
+
+        slots = np.arange(start, written) % self.capacity
+        rows = self.data[slots]
+
+        # rows overwritten while copying are dropped, including the row in
+        # the slot the writer is filling now
+        now = int(self.header[_WRITTEN])
+        overrun = now - self.capacity + 1 - start
+        if overrun > 0:
+            rows = rows[overrun:]
+            self.rows_lost += overrun
+
+        self.read_count = written
+        return rows
+
+    def close(self):
+        del self.header, self.data
+        self.shm.close()
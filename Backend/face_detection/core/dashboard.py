@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+
+#tile size
+TILE_W = 420
+TILE_H = 320
+
+#fit to screen size
+SCREEN_W = 1920
+SCREEN_H = 1080
+
+
+class DashboardCompositor:
+    """
+    Grid of panels drawn into one canvas allocated once at the fitted screen size.
+    Each panel is resized straight into its slice of the canvas and overlays
+    are rendered onto that slice, so no panel needs a copy of the frame.
+    """
+
+    def __init__(self, cols=3, rows=2, tile_w=TILE_W, tile_h=TILE_H,
+                 screen_w=SCREEN_W, screen_h=SCREEN_H):
+
+        dash_w = cols * tile_w
+        dash_h = rows * tile_h
+        scale = min(screen_w / dash_w, screen_h / dash_h)
+
+        self.width = int(dash_w * scale)
+        self.height = int(dash_h * scale)
+        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+        xs = np.linspace(0, self.width, cols + 1).astype(int)
+        ys = np.linspace(0, self.height, rows + 1).astype(int)
+
+        #row-major views into the canvas, no copies
+        self.tiles = [
+            self.canvas[ys[r]:ys[r + 1], xs[c]:xs[c + 1]]
+            for r in range(rows)
+            for c in range(cols)
+        ]
+
+        self.visible = [True] * len(self.tiles)
+
+    def toggle(self, index):
+        """
+        Shows or hides a panel. Hidden panels are blanked and skip rendering.
+        """
+
+        self.visible[index] = not self.visible[index]
+        if not self.visible[index]:
+            self.tiles[index][:] = 0
+
+    def blit(self, index, frame):
+        """
+        Resizes frame into tile index of the canvas and returns the tile.
+        """
+
+        tile = self.tiles[index]
+        cv2.resize(frame, (tile.shape[1], tile.shape[0]), dst=tile)
+        return tile
@@ -0,0 +1,214 @@
+import numpy as np
+
+
+N_LANDMARKS = 478
+
+LEFT_EYE = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+MOUTH = [13, 14, 61, 291]
+BROWS = [70, 300, 105, 334]
+TILT = [33, 263]
+YAW = [1, 234, 454]
+
+# ---------- DISTANCE PAIRS ----------
+# every distance any feature needs, gathered into one batched norm
+PAIRS = np.array([
+    # EAR: vertical1, vertical2, horizontal (left eye, then right eye)
+    (160, 144), (158, 153), (33, 133),
+    (385, 380), (387, 373), (362, 263),
+    # mouth: vertical, horizontal
+    (13, 14), (61, 291),
+    # brow to eye top (left, right)
+    (105, 159), (334, 386),
+    # brow compression: inner, outer
+    (105, 334), (70, 300),
+    # yaw: nose to left cheek, nose to right cheek
+    (1, 234), (1, 454),
+])
+
+EAR_SLICE = slice(0, 6)
+MOUTH_V, MOUTH_H = 6, 7
+BROW_LEFT, BROW_RIGHT = 8, 9
+BROW_INNER, BROW_OUTER = 10, 11
+YAW_LEFT, YAW_RIGHT = 12, 13
+
+FEATURE_NAMES = [
+    "ear", "mar", "brow_distance", "brow_compression",
+    "brow_drop", "brow_asymmetry", "head_tilt", "yaw_ratio"
+]
+
+# shared result for frames without a face, never written to
+NO_FACES = np.empty((0, N_LANDMARKS, 3), dtype=np.float32)
+NO_FACES.flags.writeable = False
+
+
+def landmarks_to_array(face_landmarks):
+    """
+    Converts MediaPipe face landmark lists to a (faces, 478, 3) float array.
+    """
+
+    if not face_landmarks:
+        return NO_FACES
+
+    return np.array(
+        [[(lm.x, lm.y, lm.z) for lm in face] for face in face_landmarks],
+        dtype=np.float32
+    )
+
+
+def to_pixels(landmarks, frame_shape):
+    """
+    Scales normalized (..., 478, 3) landmarks to (..., 478, 2) pixel coordinates.
+    """
+
+    h, w = frame_shape[:2]
+    return landmarks[..., :2] * np.array([w, h], dtype=np.float32)
+
+
+def pixel_points(points, indices):
+    """
+    Integer (x, y) tuples for drawing a set of landmarks of a single face.
+    """
+
+    return [tuple(p) for p in points[indices].astype(int).tolist()]
+
+
+def _safe_ratio(num, den, fallback):
+    out = np.full(np.broadcast(num, den).shape, fallback, dtype=np.float64)
+    np.divide(num, den, out=out, where=den != 0)
+    return out if out.ndim else float(out)
+
+
+def _distances(points, pairs=PAIRS):
+    diff = points[..., pairs[:, 0], :] - points[..., pairs[:, 1], :]
+    return np.linalg.norm(diff, axis=-1)
+
+
+def _ear(d):
+    eyes = d[..., EAR_SLICE].reshape(d.shape[:-1] + (2, 3))
+    per_eye = (eyes[..., 0] + eyes[..., 1]) / (2.0 * eyes[..., 2])
+    return per_eye.mean(axis=-1)
+
+
+def _brow_drop(points):
+    # eye top y minus inner brow y, for left and right side
+    drops = points[..., [159, 386], 1] - points[..., [105, 334], 1]
+    return drops.mean(axis=-1), np.abs(drops[..., 0] - drops[..., 1])
+
+
+def _head_tilt(points):
+    delta = points[..., 263, :] - points[..., 33, :]
+    return np.abs(np.degrees(np.arctan2(delta[..., 1], delta[..., 0])))
+
+
+def eye_aspect_ratio(points):
+    return _ear(_distances(points, PAIRS[EAR_SLICE]))
+
+
+def mouth_aspect_ratio(points):
+    d = _distances(points, PAIRS[[MOUTH_V, MOUTH_H]])
+    return _safe_ratio(d[..., 0], d[..., 1], 0.0)
+
+
+def brow_distance(points):
+    return _distances(points, PAIRS[[BROW_LEFT, BROW_RIGHT]]).mean(axis=-1)
+
+
+def brow_metrics(points):
+    """
+    Returns brow compression ratio, average inner brow drop and asymmetry.
+    """
+
+    d = _distances(points, PAIRS[[BROW_INNER, BROW_OUTER]])
+    compression = _safe_ratio(d[..., 0], d[..., 1], 1.0)
+    drop, asymmetry = _brow_drop(points)
+    return compression, drop, asymmetry
+
+
+def head_tilt(points):
+    return _head_tilt(points)
+
+
+def yaw_ratio(points):
+    d = _distances(points, PAIRS[[YAW_LEFT, YAW_RIGHT]])
+    return _safe_ratio(d[..., 0], d[..., 1], 0.0)
+
+
+def compute_features(points):
+    """
+    Computes every feature from (..., 478, 2) pixel points in one pass.
+    Any leading batch axes (faces, frames) are kept in the outputs.
+    """
+
+    d = _distances(points)
+    drop, asymmetry = _brow_drop(points)
+
+    return {
+        "ear": _ear(d),
+        "mar": _safe_ratio(d[..., MOUTH_V], d[..., MOUTH_H], 0.0),
+        "brow_distance": (d[..., BROW_LEFT] + d[..., BROW_RIGHT]) / 2,
+        "brow_compression": _safe_ratio(d[..., BROW_INNER], d[..., BROW_OUTER], 1.0),
+        "brow_drop": drop,
+        "brow_asymmetry": asymmetry,
+        "head_tilt": _head_tilt(points),
+        "yaw_ratio": _safe_ratio(d[..., YAW_LEFT], d[..., YAW_RIGHT], 0.0),
+    }
+
+
+# feature name -> (function of one face's pixel points, index into its
+# output when the function returns several features)
+FEATURE_FUNCTIONS = {
+    "ear": (eye_aspect_ratio, None),
+    "mar": (mouth_aspect_ratio, None),
+    "brow_distance": (brow_distance, None),
+    "brow_compression": (brow_metrics, 0),
+    "brow_drop": (brow_metrics, 1),
+    "brow_asymmetry": (brow_metrics, 2),
+    "head_tilt": (head_tilt, None),
+    "yaw_ratio": (yaw_ratio, None),
+}
+
+
+class FrameFeatures:
+    """
+    Per-frame memo of the first face's features, shared by the detectors.
+
+    Detectors ask for the features they declare; the pixel points and each
+    feature function run at most once per frame. The memo is dropped as
+    soon as a different landmark array comes in, so landmark arrays must
+    not be modified in place once handed to the detectors.
+    """
+
+    def __init__(self):
+        self.faces = None
+        self.frame_shape = None
+        self.points = None
+        self.outputs = {}
+
+    def get(self, faces, frame_shape, names):
+        """
+        {name: value} for the first face in faces, same values and types
+        as calling the feature functions directly.
+        """
+
+        if faces is not self.faces or frame_shape != self.frame_shape:
+            self.faces = faces
+            self.frame_shape = frame_shape
+            self.points = to_pixels(faces[0], frame_shape)
+            self.outputs = {}
+
+        features = {}
+        for name in names:
+            function, index = FEATURE_FUNCTIONS[name]
+
+            output = self.outputs.get(function)
+            if output is None:
+                output = self.outputs[function] = function(self.points)
+
+            features[name] = output if index is None else output[index]
+
+        return features
+
+
+#shared instance, one frame's features at a time
+frame_features = FrameFeatures()
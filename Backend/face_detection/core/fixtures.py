@@ -0,0 +1,75 @@
+import numpy as np
+
+from .features import N_LANDMARKS
+
+
+# neutral face, normalized coordinates, for the landmarks the detectors read
+TEMPLATE_POINTS = {
+    # nose and cheeks
+    1: (0.50, 0.50), 234: (0.38, 0.50), 454: (0.62, 0.50),
+    # left eye
+    33: (0.420, 0.420), 160: (0.435, 0.410), 158: (0.455, 0.410),
+    133: (0.470, 0.420), 153: (0.455, 0.430), 144: (0.435, 0.430),
+    159: (0.445, 0.408), 145: (0.445, 0.432),
+    # right eye
+    362: (0.530, 0.420), 385: (0.545, 0.410), 387: (0.565, 0.410),
+    263: (0.580, 0.420), 373: (0.565, 0.430), 380: (0.545, 0.430),
+    386: (0.555, 0.408), 374: (0.555, 0.432),
+    # brows
+    70: (0.41, 0.37), 105: (0.44, 0.36), 334: (0.56, 0.36), 300: (0.59, 0.37),
+    # mouth
+    13: (0.50, 0.600), 14: (0.50, 0.610), 61: (0.46, 0.605), 291: (0.54, 0.605),
+}
+
+EYELIDS = [160, 158, 153, 144, 159, 145, 385, 387, 373, 380, 386, 374]
+EYE_LINE_Y = 0.42
+
+
+def face_template(seed=0):
+    """
+    One (478, 3) face. Unlisted landmarks are scattered inside the face oval.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    angle = rng.uniform(0, 2 * np.pi, N_LANDMARKS)
+    radius = np.sqrt(rng.uniform(0, 1, N_LANDMARKS))
+
+    face = np.zeros((N_LANDMARKS, 3), dtype=np.float32)
+    face[:, 0] = 0.5 + 0.12 * radius * np.cos(angle)
+    face[:, 1] = 0.5 + 0.16 * radius * np.sin(angle)
+    face[:, 2] = rng.normal(0, 0.02, N_LANDMARKS)
+
+    for index, (x, y) in TEMPLATE_POINTS.items():
+        face[index, :2] = (x, y)
+
+    return face
+
+
+def synthetic_session(frames, fps=30, seed=0):
+    """
+    A (frames, 478, 3) landmark series with jitter, periodic blinks and
+    occasional head turns, so every detector branch gets exercised.
+    """
+
+    rng = np.random.default_rng(seed)
+    template = face_template(seed)
+
+    faces = np.repeat(template[None], frames, axis=0)
+    faces[:, :, :2] += rng.normal(0, 0.0005, (frames, N_LANDMARKS, 2))
+
+    t = np.arange(frames) / fps
+
+    # blink roughly every 3 s, eyelids collapse onto the eye line for ~130 ms
+    blinking = (t % 3.0) < 0.13
+    lids = faces[:, EYELIDS, 1]
+    faces[:, EYELIDS, 1] = np.where(blinking[:, None], EYE_LINE_Y, lids)
+
+    # head turns every 10 s, clear of calibration: the nose shifts towards
+    # one cheek for 2 s, alternating sides
+    phase = t % 10.0
+    side = np.where((t // 10.0) % 2 == 0, 1.0, -1.0)
+    turn = np.where((phase >= 5.0) & (phase < 7.0), side, 0)
+    faces[:, 1, 0] += 0.05 * turn
+
+    return faces
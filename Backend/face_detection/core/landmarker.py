@@ -0,0 +1,166 @@
+import cv2
+import numpy as np
+import os
+import threading
+
+from .features import landmarks_to_array
+from .profiling import profiler
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.abspath(os.path.join(current_dir, "..", "face_landmarker.task"))
+
+# model file contents by path, read from disk once per process
+_model_assets = {}
+
+
+def model_asset(path=MODEL_PATH):
+    """
+    Bytes of a bundled model file. Every landmarker and detector built in
+    the process shares one copy.
+    """
+
+    if path not in _model_assets:
+        with open(path, "rb") as f:
+            _model_assets[path] = f.read()
+
+    return _model_assets[path]
+
+
+def create_landmarker(num_faces=1, running_mode=None, result_callback=None):
+    """
+    Builds a FaceLandmarker from the bundled model. VIDEO mode by default;
+    LIVE_STREAM mode needs a result_callback.
+    """
+
+    # mediapipe takes over a second to import, only pay for it when a model is built
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    base_options = python.BaseOptions(model_asset_buffer=model_asset())
+    options = vision.FaceLandmarkerOptions(
+        base_options=base_options,
+        running_mode=running_mode or vision.RunningMode.VIDEO,
+        num_faces=num_faces,
+        result_callback=result_callback
+    )
+
+    return vision.FaceLandmarker.create_from_options(options)
+
+
+def to_mp_image(image):
+    """
+    BGR frame to the SRGB image MediaPipe expects.
+    """
+
+    import mediapipe as mp
+
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+
+
+def crop_to_roi(frame, roi, crop_size):
+    """
+    Cuts the (x0, y0, x1, y1) box out of frame and downscales it so its
+    longest side is at most crop_size. Normalized landmarks do not change
+    with a uniform resize.
+    """
+
+    x0, y0, x1, y1 = roi
+    image = frame[y0:y1, x0:x1]
+
+    scale = crop_size / max(image.shape[:2])
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale,
+                           interpolation=cv2.INTER_AREA)
+
+    return image
+
+
+def to_frame_coordinates(faces, roi, frame_shape):
+    """
+    Maps (faces, 478, 3) landmarks normalized to the roi crop back to
+    landmarks normalized to the full frame. z follows the x scale.
+    """
+
+    x0, y0, x1, y1 = roi
+    h, w = frame_shape[:2]
+
+    scale = np.array([(x1 - x0) / w, (y1 - y0) / h, (x1 - x0) / w], dtype=np.float32)
+    offset = np.array([x0 / w, y0 / h, 0], dtype=np.float32)
+
+    return faces * scale + offset
+
+
+class LandmarkStage:
+    """
+    Runs one landmark inference per frame.
+    The returned (faces, 478, 3) array is shared by every detector for that frame.
+
+    The landmarker is built on the first frame, or earlier by load(), e.g.
+    from a background thread while the camera starts.
+    """
+
+    def __init__(self, num_faces=1, crop_size=256):
+        self.num_faces = num_faces
+        self.landmarker = None
+        self.lock = threading.Lock()
+        self.crop_size = crop_size
+        self.frame_count = 0
+        self.last_timestamp = -1
+
+    def load(self):
+        with self.lock:
+            if self.landmarker is None:
+                self.landmarker = create_landmarker(self.num_faces)
+        return self
+
+    def skip(self):
+        """
+        Called for a frame the landmarks were not run on, e.g. one
+        PresenceStage found no face in. Stages that carry landmarks from
+        frame to frame drop them here.
+        """
+
+    def process(self, frame, timestamp_ms=None, roi=None):
+        """
+        timestamp_ms is the media time of the frame. Without it the frame
+        counter is used, as VIDEO mode only needs increasing timestamps.
+
+        roi is an (x0, y0, x1, y1) pixel box, e.g. from PresenceStage. The
+        landmarker then runs on that crop, downscaled to crop_size, and the
+        landmarks are mapped back to full-frame coordinates. VIDEO mode
+        tracks from one crop to the next, so the box should only move when
+        the face does; PresenceStage holds it steady.
+        """
+
+        if self.landmarker is None:
+            self.load()
+
+        if timestamp_ms is None:
+            timestamp_ms = self.frame_count
+
+        # VIDEO mode rejects repeated or decreasing timestamps
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp + 1)
+        self.last_timestamp = timestamp_ms
+
+        lap = profiler.lap()
+
+        image = frame
+        if roi is not None:
+            image = crop_to_roi(frame, roi, self.crop_size)
+            lap("landmarks.crop")
+
+        mp_image = to_mp_image(image)
+        lap("landmarks.color")
+
+        result = self.landmarker.detect_for_video(mp_image, timestamp_ms)
+        self.frame_count += 1
+        lap("landmarks.inference")
+
+        faces = landmarks_to_array(result.face_landmarks)
+        if roi is not None and len(faces):
+            faces = to_frame_coordinates(faces, roi, frame.shape)
+        lap("landmarks.convert")
+
+        return faces
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .features import NO_FACES, landmarks_to_array
+from .landmarker import create_landmarker, crop_to_roi, to_frame_coordinates, to_mp_image
+
+
+# faces is the (faces, 478, 3) array in full-frame coordinates, tag is
+# whatever the caller submitted with the frame (e.g. its CapturedFrame)
+LiveResult = namedtuple("LiveResult", ["frame", "timestamp_ms", "faces", "tag"])
+
+
+class _Pending:
+    __slots__ = ("frame", "roi", "tag", "faces")
+
+    def __init__(self, frame, roi, tag, faces=None):
+        self.frame = frame
+        self.roi = roi
+        self.tag = tag
+        self.faces = faces
+
+
+class LiveLandmarkEngine:
+    """
+    LIVE_STREAM landmark engine. submit() hands a frame to detect_async and
+    returns straight away, so inference overlaps with capture and rendering.
+
+    Results come back on MediaPipe's callback thread and are handed out by
+    poll()/get() in submission order. At most max_in_flight frames wait for
+    inference; submit() refuses more. MediaPipe may drop frames when busy,
+    those are skipped once a later result arrives and counted in
+    frames_dropped.
+
+    The landmarker is built on the first submit() or by load().
+    """
+
+    def __init__(self, num_faces=1, max_in_flight=2, crop_size=256):
+        self.num_faces = num_faces
+        self.landmarker = None
+        self.lock = threading.Lock()
+        self.max_in_flight = max_in_flight
+        self.crop_size = crop_size
+
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.last_timestamp = -1
+        self.last_result = -1
+
+        self.frames_submitted = 0
+        self.frames_refused = 0
+        self.frames_dropped = 0
+
+    def load(self):
+        from mediapipe.tasks.python import vision
+
+        with self.lock:
+            if self.landmarker is None:
+                self.landmarker = create_landmarker(
+                    self.num_faces,
+                    running_mode=vision.RunningMode.LIVE_STREAM,
+                    result_callback=self._on_result
+                )
+        return self
+
+    def submit(self, frame, timestamp_ms=None, roi=None, tag=None):
+        """
+        Starts inference on frame. timestamp_ms defaults to the monotonic
+        clock in ms. Returns False when max_in_flight frames are already
+        waiting; the frame is then not processed. An error from building
+        the landmarker or from detect_async is raised with the frame
+        withdrawn.
+        """
+
+        with self.condition:
+            if self.in_flight >= self.max_in_flight:
+                self.frames_refused += 1
+                return False
+
+            timestamp_ms = self._next_timestamp(timestamp_ms)
+            self.pending[timestamp_ms] = _Pending(frame, roi, tag)
+            self.in_flight += 1
+
+        try:
+            if self.landmarker is None:
+                self.load()
+
+            image = frame if roi is None else crop_to_roi(frame, roi, self.crop_size)
+            self.landmarker.detect_async(to_mp_image(image), timestamp_ms)
+        except BaseException:
+            # a frame that never reached the landmarker gets no result,
+            # left pending it would hold back poll() and fill in_flight
+            with self.condition:
+                entry = self.pending.get(timestamp_ms)
+                if entry is not None and entry.faces is None:
+                    del self.pending[timestamp_ms]
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+            raise
+
+        with self.condition:
+            self.frames_submitted += 1
+        return True
+
+    def skip(self, frame, timestamp_ms=None, tag=None):
+        """
+        Queues a frame with no face (e.g. gated out by PresenceStage) so it
+        is delivered in order with the inferred ones.
+        """
+
+        with self.condition:
+            timestamp_ms = self._next_timestamp(timestamp_ms)
+            self.pending[timestamp_ms] = _Pending(frame, None, tag, NO_FACES)
+            self.condition.notify_all()
+
+    def poll(self):
+        """
+        Returns every result that is ready, oldest first, without waiting.
+        """
+
+        with self.condition:
+            return self._drain()
+
+    def get(self, timeout=None):
+        """
+        Waits for the next result in order. Returns None on timeout or when
+        nothing is pending.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.condition:
+            while self.pending:
+                ready = self._drain(limit=1)
+                if ready:
+                    return ready[0]
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+        return None
+
+    def close(self):
+        if self.landmarker is not None:
+            self.landmarker.close()
+
+    def _next_timestamp(self, timestamp_ms):
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic() * 1000
+
+        # LIVE_STREAM mode rejects repeated or decreasing timestamps
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp + 1)
+        self.last_timestamp = timestamp_ms
+        return timestamp_ms
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        faces = landmarks_to_array(result.face_landmarks)
+
+        with self.condition:
+            entry = self.pending.get(timestamp_ms)
+            if entry is None:
+                return
+
+            if entry.roi is not None and len(faces):
+                faces = to_frame_coordinates(faces, entry.roi, entry.frame.shape)
+
+            entry.faces = faces
+            self.last_result = timestamp_ms
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def _drain(self, limit=None):
+        # caller holds the condition
+        ready = []
+
+        while self.pending and (limit is None or len(ready) < limit):
+            timestamp_ms, entry = next(iter(self.pending.items()))
+
+            if entry.faces is None:
+                # results arrive in timestamp order, so an older frame
+                # still without one was dropped by MediaPipe
+                if timestamp_ms >= self.last_result:
+                    break
+                self.frames_dropped += 1
+                self.in_flight -= 1
+                del self.pending[timestamp_ms]
+                continue
+
+            del self.pending[timestamp_ms]
+            ready.append(LiveResult(entry.frame, timestamp_ms, entry.faces, entry.tag))
+
+        return ready
@@ -0,0 +1,161 @@
+import cv2
+import os
+import threading
+
+from .landmarker import model_asset, to_mp_image
+from .profiling import profiler
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DETECTOR_PATH = os.path.abspath(os.path.join(current_dir, "..", "blaze_face_short_range.tflite"))
+
+
+def create_face_detector(min_confidence=0.5):
+    """
+    Builds a VIDEO mode BlazeFace detector from the bundled model.
+    """
+
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    base_options = python.BaseOptions(model_asset_buffer=model_asset(DETECTOR_PATH))
+    options = vision.FaceDetectorOptions(
+        base_options=base_options,
+        running_mode=vision.RunningMode.VIDEO,
+        min_detection_confidence=min_confidence
+    )
+
+    return vision.FaceDetector.create_from_options(options)
+
+
+class PresenceStage:
+    """
+    Cheap face-presence check that runs before the landmark stage.
+
+    BlazeFace runs on a downscaled frame and returns a padded, square face
+    box in full-frame pixels, or None when nobody is in view. After
+    idle_after empty checks the stage goes idle and only checks every
+    idle_interval frames until a face comes back.
+
+    The box is held steady: the landmarker tracks across frames in VIDEO
+    and LIVE_STREAM mode, so a crop that shifted with every detection would
+    feed it a jittering image. The previous box is kept while the face
+    stays hold_margin of the box size away from its edges and within
+    hold_scale of the size it was built for; a new box is snapped to a
+    snap pixel grid.
+
+    Like LandmarkStage, the detector is built on first use or by load().
+    """
+
+    def __init__(self, min_confidence=0.5, detect_width=320, padding=0.5,
+                 idle_after=15, idle_interval=5, snap=16, hold_margin=0.1, hold_scale=1.25):
+        self.min_confidence = min_confidence
+        self.detector = None
+        self.lock = threading.Lock()
+        self.detect_width = detect_width
+        self.padding = padding
+
+        self.snap = snap
+        self.hold_margin = hold_margin
+        self.hold_scale = hold_scale
+        self.roi = None
+        self.roi_face_size = None
+
+        self.idle_after = idle_after
+        self.idle_interval = idle_interval
+        self.misses = 0
+        self.skipped = 0
+
+        self.frame_count = 0
+        self.last_timestamp = -1
+
+    def load(self):
+        with self.lock:
+            if self.detector is None:
+                self.detector = create_face_detector(self.min_confidence)
+        return self
+
+    @property
+    def idle(self):
+        return self.misses >= self.idle_after
+
+    def process(self, frame, timestamp_ms=None):
+        """
+        Returns (x0, y0, x1, y1) of the padded face region, or None.
+        """
+
+        if self.idle and self.skipped < self.idle_interval - 1:
+            self.skipped += 1
+            return None
+        self.skipped = 0
+
+        if self.detector is None:
+            self.load()
+
+        if timestamp_ms is None:
+            timestamp_ms = self.frame_count
+
+        # VIDEO mode rejects repeated or decreasing timestamps
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp + 1)
+        self.last_timestamp = timestamp_ms
+
+        with profiler.stage("presence.detect"):
+            h, w = frame.shape[:2]
+            scale = min(1.0, self.detect_width / w)
+            small = cv2.resize(frame, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA) if scale < 1 else frame
+
+            result = self.detector.detect_for_video(to_mp_image(small), timestamp_ms)
+            self.frame_count += 1
+
+        if not result.detections:
+            self.misses += 1
+            self.roi = None
+            return None
+        self.misses = 0
+
+        # largest face wins
+        box = max(result.detections,
+                  key=lambda d: d.bounding_box.width * d.bounding_box.height).bounding_box
+
+        face = (box.origin_x / scale, box.origin_y / scale,
+                (box.origin_x + box.width) / scale, (box.origin_y + box.height) / scale)
+        return self.stable_roi(face, frame.shape)
+
+    def stable_roi(self, face, frame_shape):
+        """
+        The padded box for an (x0, y0, x1, y1) face box in full-frame
+        pixels: the previous one while it still fits, otherwise a new one
+        snapped to the grid. None when the box falls outside the frame.
+        """
+
+        fx0, fy0, fx1, fy1 = face
+        size = max(fx1 - fx0, fy1 - fy0)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin = self.hold_margin * max(x1 - x0, y1 - y0)
+            ratio = size / self.roi_face_size
+
+            inside = (fx0 >= x0 + margin and fy0 >= y0 + margin and
+                      fx1 <= x1 - margin and fy1 <= y1 - margin)
+            if inside and 1 / self.hold_scale <= ratio <= self.hold_scale:
+                return self.roi
+
+        h, w = frame_shape[:2]
+        snap = self.snap
+
+        # snapped, so detection jitter alone never moves the crop
+        cx = round((fx0 + fx1) / 2 / snap) * snap
+        cy = round((fy0 + fy1) / 2 / snap) * snap
+        half = max(snap, round(size * (0.5 + self.padding) / snap) * snap)
+
+        x0, y0 = max(0, int(cx - half)), max(0, int(cy - half))
+        x1, y1 = min(w, int(cx + half)), min(h, int(cy + half))
+        if x1 <= x0 or y1 <= y0:
+            self.roi = None
+            return None
+
+        self.roi = (x0, y0, x1, y1)
+        self.roi_face_size = size
+        return self.roi
@@ -0,0 +1,190 @@
+import os
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Lap:
+    __slots__ = ("profiler", "last")
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.last = time.perf_counter()
+
+    def __call__(self, name):
+        now = time.perf_counter()
+        self.profiler.record(name, now - self.last)
+        self.last = now
+
+
+def _no_lap(name):
+    pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Per-stage timings kept in fixed-size rolling windows.
+
+    When disabled, stage() and lap() hand back shared no-op objects, so the
+    instrumented code pays for one attribute check and one call.
+    """
+
+    def __init__(self, enabled=False, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.durations = {}
+        self.counts = {}
+        self.ticks = deque(maxlen=window)
+        self.last_print = time.perf_counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def stage(self, name):
+        """
+        Context manager timing one block.
+        """
+
+        if not self.enabled:
+            return NULL_STAGE
+        return _Stage(self, name)
+
+    def lap(self):
+        """
+        Returns a callable; each call records the time since the previous one.
+        """
+
+        if not self.enabled:
+            return _no_lap
+        return _Lap(self)
+
+    def record(self, name, seconds):
+        samples = self.durations.get(name)
+        if samples is None:
+            samples = self.durations[name] = np.zeros(self.window)
+            self.counts[name] = 0
+
+        samples[self.counts[name] % self.window] = seconds
+        self.counts[name] += 1
+
+    def tick(self):
+        """
+        Marks the end of a frame, for the FPS readout.
+        """
+
+        if self.enabled:
+            self.ticks.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.ticks) < 2:
+            return 0.0
+        return (len(self.ticks) - 1) / (self.ticks[-1] - self.ticks[0])
+
+    def snapshot(self):
+        """
+        p50/p95/p99 in ms for every stage over its rolling window, plus FPS.
+        """
+
+        stages = {}
+        for name, samples in self.durations.items():
+            ms = samples[:min(self.counts[name], self.window)] * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stages[name] = {
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "count": self.counts[name],
+            }
+
+        return {"fps": self.fps(), "stages": stages}
+
+    def report(self):
+        snap = self.snapshot()
+        lines = [f"{'stage':<28}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        for name, s in sorted(snap["stages"].items()):
+            lines.append(f"{name:<28}{s['p50']:>8.2f}{s['p95']:>8.2f}{s['p99']:>8.2f}")
+        lines.append(f"FPS: {snap['fps']:.1f}")
+        return lines
+
+    def print_every(self, seconds=5.0):
+        """
+        Console readout, at most once per interval.
+        """
+
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        if now - self.last_print >= seconds:
+            self.last_print = now
+            print("\n".join(self.report()))
+
+    def draw(self, frame, origin=(20, 30)):
+        """
+        On-screen readout in the top left corner of the frame.
+        """
+
+        if not self.enabled:
+            return frame
+
+        x, y = origin
+        for i, line in enumerate(self.report()):
+            cv2.putText(frame, line, (x, y + i * 20),
+                        cv2.FONT_HERSHEY_PLAIN, 1.1, (255, 255, 255), 1)
+        return frame
+
+
+class StartupTimer:
+    """
+    Time from launch to each startup milestone, e.g. imports done, models
+    built, first processed frame. Marks may come from any thread; only the
+    first mark of a name counts.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = {}
+
+    def mark(self, name):
+        self.marks.setdefault(name, time.perf_counter() - self.start)
+
+    def report(self):
+        return "Startup: " + ", ".join(
+            f"{name} {seconds * 1000:.0f} ms"
+            for name, seconds in sorted(self.marks.items(), key=lambda mark: mark[1])
+        )
+
+
+#shared instance, COGNITIVELENS_PROFILE=1 turns it on
+profiler = Profiler(enabled=os.environ.get("COGNITIVELENS_PROFILE") == "1")
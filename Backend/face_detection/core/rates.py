@@ -0,0 +1,49 @@
+import math
+
+
+class WindowCounter:
+    """
+    Events in the last `window` seconds of media time, in constant memory.
+
+    Events are counted into `buckets` slots of window / buckets seconds;
+    the window is the current slot plus the buckets - 1 before it, so it is
+    exact to one slot. Timestamps must not go backwards; a late event is
+    counted in the current slot.
+    """
+
+    def __init__(self, window=60.0, buckets=60):
+        self.window = window
+        self.slot_seconds = window / buckets
+        self.counts = [0] * buckets
+        self.total = 0
+        self.bucket = None
+
+    def _advance(self, now):
+        bucket = math.floor(now / self.slot_seconds)
+
+        if self.bucket is None:
+            self.bucket = bucket
+        elif bucket > self.bucket:
+            # slots that fell out of the window are cleared on the way
+            n = len(self.counts)
+            for b in range(max(self.bucket + 1, bucket - n + 1), bucket + 1):
+                slot = b % n
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+            self.bucket = bucket
+
+    def add(self, now, count=1):
+        self._advance(now)
+        self.counts[self.bucket % len(self.counts)] += count
+        self.total += count
+
+    def count(self, now):
+        self._advance(now)
+        return self.total
+
+    def elapsed(self, now, start):
+        """
+        Seconds the current count covers: time since start, at most window.
+        """
+
+        return min(now - start, self.window)
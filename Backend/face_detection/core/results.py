@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+NO_FACE = "NO_FACE"
+CALIBRATING = "CALIBRATING"
+
+
+@dataclass
+class DetectorResult:
+    """
+    Output of a detector's compute step for one frame.
+
+    state     -- NO_FACE, CALIBRATING or a detector specific state
+    scores    -- the numbers the detector reports (stress_score, turns_per_minute, ...)
+    features  -- raw per-frame features and baselines behind the scores
+    landmarks -- normalized (478, 3) landmarks of the scored face, None without a face
+    """
+
+    state: str
+    scores: dict = field(default_factory=dict)
+    features: dict = field(default_factory=dict)
+    landmarks: np.ndarray = None
+    timestamp_ms: float = None
@@ -0,0 +1,146 @@
+import time
+
+from .results import CALIBRATING
+
+
+class _Entry:
+    __slots__ = ("name", "detector", "priority", "cadence", "cost_ms", "advance_ms", "result")
+
+    def __init__(self, name, detector, priority):
+        self.name = name
+        self.detector = detector
+        self.priority = priority
+        self.cadence = 1
+        self.cost_ms = None
+        self.advance_ms = 0.0
+        self.result = None
+
+    def expected_ms(self, cadence):
+        # scored on one frame in cadence, advanced on the others
+        return self.cost_ms / cadence + self.advance_ms * (1 - 1 / cadence)
+
+
+class DetectorScheduler:
+    """
+    Runs detectors within a per-frame time budget.
+
+    detectors is a list of (name, detector, priority). Priority 0 runs on
+    every frame no matter what; higher numbers are less urgent. Each
+    detector's compute() and advance() costs are tracked as moving
+    averages, and every adjust_every frames the expected cost per frame is
+    compared with budget_ms:
+
+    - over budget: the least urgent detector still below max_cadence runs
+      half as often
+    - under headroom * budget: the most urgent slowed down detector runs
+      twice as often, if that still fits under the headroom
+
+    On a frame a detector is not scored, it hands back its last result and
+    only advance() runs: the frame-counted event state (blink hysteresis,
+    turn debounce, closed-eye and side-glance counting) still sees every
+    frame, from features that are cheap or already cached for the frame,
+    so blinks shorter than the cadence are not missed and debounce lengths
+    stay in frames. What is saved is the rest of the features and the
+    scoring, at the price of scores, baseline refinement and overlays
+    lagging by up to cadence - 1 frames. Detectors still calibrating, and
+    frames without a face, are always scored so calibration keeps its
+    length in frames and "no face" shows at once.
+
+    Slowed down detectors are staggered so they do not all land on the
+    same frame. With budget_ms=None every detector runs on every frame.
+    """
+
+    def __init__(self, detectors, budget_ms=None, max_cadence=8, adjust_every=30,
+                 headroom=0.8, smoothing=0.1):
+        self.entries = [_Entry(name, detector, priority) for name, detector, priority in detectors]
+        self.budget_ms = budget_ms
+        self.max_cadence = max_cadence
+        self.adjust_every = adjust_every
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.frames = 0
+
+    def run(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Returns one result per detector, in order, fresh or reused.
+        """
+
+        results = []
+
+        for i, entry in enumerate(self.entries):
+            scored = (
+                entry.result is None or not len(faces) or entry.result.state == CALIBRATING or
+                (self.frames + i) % entry.cadence == 0
+            )
+
+            start = time.perf_counter()
+            if scored:
+                entry.result = entry.detector.compute(faces, frame_shape, timestamp_ms)
+            else:
+                entry.detector.advance(faces, frame_shape, timestamp_ms)
+            cost_ms = (time.perf_counter() - start) * 1000
+
+            # faceless frames cost next to nothing and would hide the real load
+            if len(faces):
+                if not scored:
+                    entry.advance_ms += self.smoothing * (cost_ms - entry.advance_ms)
+                elif entry.cost_ms is None:
+                    entry.cost_ms = cost_ms
+                else:
+                    entry.cost_ms += self.smoothing * (cost_ms - entry.cost_ms)
+
+            results.append(entry.result)
+
+        self.frames += 1
+        if self.budget_ms is not None and self.frames % self.adjust_every == 0:
+            self._adjust()
+
+        return results
+
+    def load_ms(self):
+        """
+        Expected detector time per frame at the current cadences.
+        """
+
+        return sum(e.expected_ms(e.cadence) for e in self.entries if e.cost_ms is not None)
+
+    def _adjust(self):
+        load = self.load_ms()
+        degradable = [e for e in self.entries if e.priority > 0 and e.cost_ms is not None]
+
+        if load > self.budget_ms:
+            for entry in sorted(degradable, key=lambda e: -e.priority):
+                if entry.cadence < self.max_cadence:
+                    entry.cadence *= 2
+                    return
+
+        elif load < self.budget_ms * self.headroom:
+            for entry in sorted(degradable, key=lambda e: e.priority):
+                if entry.cadence > 1:
+                    restored = load + entry.expected_ms(entry.cadence // 2) - entry.expected_ms(entry.cadence)
+                    if restored <= self.budget_ms * self.headroom:
+                        entry.cadence //= 2
+                    return
+
+    def cadences(self):
+        """
+        {name: cadence}, 1 meaning every frame, n every nth frame.
+        """
+
+        return {e.name: e.cadence for e in self.entries}
+
+    def costs(self):
+        """
+        {name: average compute() time in ms}, for detectors that have run.
+        """
+
+        return {e.name: e.cost_ms for e in self.entries if e.cost_ms is not None}
+
+    def summary(self):
+        """
+        One line for the dashboard, e.g. "Load 6.1/8 ms  stress 1/2  confusion 1/4".
+        """
+
+        budget = "" if self.budget_ms is None else f"/{self.budget_ms:g}"
+        slowed = "".join(f"  {e.name} 1/{e.cadence}" for e in self.entries if e.cadence > 1)
+        return f"Load {self.load_ms():.1f}{budget} ms{slowed}"
@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+
+from .features import N_LANDMARKS
+
+
+MAGIC = b"CLSESS01"
+SESSION_EXTENSION = ".landmarks"
+
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("precision", "<u4"),      # bytes per landmark coordinate, 2 or 4
+    ("landmarks", "<u4"),
+    ("count", "<u8"),          # records written so far
+    ("index_offset", "<u8"),   # 0 until close() writes the timestamp index
+    ("width", "<u4"),          # frame size the landmarks are normalized to
+    ("height", "<u4"),
+    ("pad", "V24"),
+])
+
+
+def record_dtype(precision=2, landmarks=N_LANDMARKS):
+    """
+    One frame: timestamp, face-present flag and the first face's landmarks.
+    """
+
+    return np.dtype([
+        ("timestamp_ms", "<f8"),
+        ("face", "u1"),
+        ("landmarks", f"<f{precision}", (landmarks, 3)),
+    ], align=True)
+
+
+class SessionWriter:
+    """
+    Append-only landmark log backed by a memory-mapped file. frame_shape is
+    stored so pixel-space features can be recomputed on replay.
+
+    append() is a single record assignment into the mapping plus a header
+    count bump, no syscalls; the file grows chunk records at a time. close()
+    trims the file and writes a contiguous timestamp index after the records.
+    """
+
+    def __init__(self, path, frame_shape=None, dtype=np.float16, chunk=4096):
+        self.path = path
+        self.chunk = chunk
+        self.record = record_dtype(np.dtype(dtype).itemsize)
+
+        with open(path, "wb") as f:
+            header = np.zeros((), dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["precision"] = np.dtype(dtype).itemsize
+            header["landmarks"] = N_LANDMARKS
+            if frame_shape is not None:
+                header["height"], header["width"] = frame_shape[:2]
+            f.write(header.tobytes())
+
+        self.header = np.memmap(path, dtype=HEADER_DTYPE, mode="r+", shape=())
+        self.count_field = self.header["count"]
+        self.records = None
+        self.capacity = 0
+        self.count = 0
+        self._grow()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _grow(self):
+        if self.records is not None:
+            self.records.flush()
+
+        self.capacity += self.chunk
+        size = HEADER_SIZE + self.capacity * self.record.itemsize
+        with open(self.path, "r+b") as f:
+            f.truncate(size)
+
+        self.records = np.memmap(self.path, dtype=self.record, mode="r+",
+                                 offset=HEADER_SIZE, shape=(self.capacity,))
+
+        # field views made once, indexing them is far cheaper than a record
+        self.timestamp_col = self.records["timestamp_ms"]
+        self.face_col = self.records["face"]
+        self.landmark_col = self.records["landmarks"]
+
+    def append(self, timestamp_ms, faces):
+        """
+        Logs one frame. faces is the (faces, 478, 3) landmark array; only
+        the first face is kept.
+        """
+
+        if self.count == self.capacity:
+            self._grow()
+
+        i = self.count
+        self.timestamp_col[i] = timestamp_ms
+        self.face_col[i] = len(faces) > 0
+        if len(faces):
+            self.landmark_col[i] = faces[0]
+
+        self.count += 1
+        self.count_field[...] = self.count
+
+    def close(self):
+        if self.records is None:
+            return
+
+        timestamps = np.ascontiguousarray(self.records["timestamp_ms"][:self.count])
+        self.records.flush()
+        self.records = self.timestamp_col = self.face_col = self.landmark_col = None
+
+        index_offset = HEADER_SIZE + self.count * self.record.itemsize
+        with open(self.path, "r+b") as f:
+            f.truncate(index_offset)
+            f.seek(index_offset)
+            f.write(timestamps.tobytes())
+
+        self.header["index_offset"] = index_offset
+        self.header.flush()
+        self.header = self.count_field = None
+
+
+class SessionReader:
+    """
+    Read-only view of a session log. Every array handed out is a view into
+    the mapping, nothing is copied. Files still being written are readable
+    up to the last published record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a landmark session log")
+
+        self.record = record_dtype(int(header["precision"]), int(header["landmarks"]))
+        self.frame_shape = (int(header["height"]), int(header["width"])) if header["width"] else None
+        count = int(header["count"])
+
+        self.records = np.memmap(path, dtype=self.record, mode="r",
+                                 offset=HEADER_SIZE, shape=(count,)) if count else \
+            np.empty(0, dtype=self.record)
+
+        # closed logs have a contiguous index, open ones search the records
+        if header["index_offset"]:
+            self.timestamps = np.memmap(path, dtype="<f8", mode="r",
+                                        offset=int(header["index_offset"]), shape=(count,))
+        else:
+            self.timestamps = self.records["timestamp_ms"]
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def landmarks(self):
+        return self.records["landmarks"]
+
+    @property
+    def present(self):
+        return self.records["face"]
+
+    def range(self, start_ms=None, end_ms=None):
+        """
+        Index range [first, last) of records with start_ms <= t < end_ms.
+        """
+
+        first = 0 if start_ms is None else int(np.searchsorted(self.timestamps, start_ms))
+        last = len(self) if end_ms is None else int(np.searchsorted(self.timestamps, end_ms))
+        return first, last
+
+    def slice(self, start_ms=None, end_ms=None):
+        """
+        Zero-copy (timestamps, present, landmarks) for a time range.
+        """
+
+        first, last = self.range(start_ms, end_ms)
+        records = self.records[first:last]
+        return records["timestamp_ms"], records["face"], records["landmarks"]
+
+
+def session_path(out_dir, name):
+    return os.path.join(out_dir, name + SESSION_EXTENSION)
@@ -0,0 +1,168 @@
+import numpy as np
+
+
+# direction codes, as the attention detector names them
+CENTER, LEFT, RIGHT = 0, 1, -1
+
+
+def run_lengths(mask):
+    """
+    Length of the run of True values ending at each frame, 0 where False.
+    """
+
+    mask = np.asarray(mask, dtype=bool)
+    index = np.arange(len(mask))
+
+    last_false = np.maximum.accumulate(np.where(mask, -1, index))
+    return index - last_false
+
+
+def cumulative(events, frames):
+    """
+    Running event count per frame from sorted event indices.
+    """
+
+    counts = np.zeros(frames, dtype=np.int64)
+    np.add.at(counts, events, 1)
+    return np.cumsum(counts)
+
+
+def window_counts(events, timestamps_ms, window=60.0, buckets=60):
+    """
+    core.rates.WindowCounter over a series: for every frame, the events
+    (sorted frame indices) counted in the window ending at that frame, with
+    the same one-slot bucketing.
+    """
+
+    now = np.asarray(timestamps_ms, dtype=np.float64) / 1000
+    frame_buckets = np.floor(now / (window / buckets))
+    event_buckets = frame_buckets[events]
+
+    # events so far, minus the ones whose slot left the window
+    return cumulative(events, len(now)) - np.searchsorted(
+        event_buckets, frame_buckets - buckets, side="right"
+    )
+
+
+def per_minute(events, timestamps_ms, start_ms, window=60.0, buckets=60):
+    """
+    Event rate per minute over the last window seconds, as the detectors
+    report it: before a full window has passed since start_ms the rate is
+    over the time so far, 0 before any time has passed.
+    """
+
+    now = np.asarray(timestamps_ms, dtype=np.float64) / 1000
+    elapsed = np.minimum(now - start_ms / 1000, window)
+    counts = window_counts(events, timestamps_ms, window, buckets)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(elapsed > 0, counts * 60 / elapsed, 0.0)
+
+
+def sleep_runs(ear, mar, consec_frames=15, ear_closed=0.15, ear_drowsy=0.20, mar_yawn=0.35):
+    """
+    DrowsinessDetector over a series. Returns (sleep_counter, sleepy,
+    onsets) where onsets are the frames a sleepy run reaches consec_frames.
+    """
+
+    ear = np.asarray(ear)
+    mar = np.asarray(mar)
+
+    closed = (ear <= ear_closed) | ((ear <= ear_drowsy) & (mar >= mar_yawn))
+    counter = run_lengths(closed)
+
+    return counter, counter >= consec_frames, np.flatnonzero(counter == consec_frames)
+
+
+def blink_events(ear, close_threshold=0.22, reopen_threshold=0.25):
+    """
+    StressDetector's OPEN/CLOSED hysteresis over a series.
+
+    Every frame below close_threshold sets CLOSED and every frame above
+    reopen_threshold sets OPEN; in between the last state carries forward.
+    This only matches the streaming detector when close_threshold is below
+    reopen_threshold.
+    Returns (closed, blinks, counts): the state after each frame, the frames
+    where the eye reopened (a blink) and the running blink count.
+    """
+
+    ear = np.asarray(ear)
+    index = np.arange(len(ear))
+
+    # frame of the last closing or reopening sample, -1 before the first
+    closes = ear < close_threshold
+    opens = ear > reopen_threshold
+    last = np.maximum.accumulate(np.where(closes | opens, index, -1))
+
+    # the eye starts OPEN
+    closed = np.where(last >= 0, closes[np.maximum(last, 0)], False)
+
+    blinks = np.flatnonzero(closed[:-1] & ~closed[1:]) + 1
+    return closed, blinks, cumulative(blinks, len(ear))
+
+
+def head_directions(yaw, baseline, threshold=0.30):
+    """
+    CENTER/LEFT/RIGHT codes from the yaw deviation against the baseline.
+    """
+
+    deviation = np.asarray(yaw) - baseline
+
+    directions = np.full(len(deviation), CENTER, dtype=np.int8)
+    directions[deviation > threshold] = LEFT
+    directions[deviation < -threshold] = RIGHT
+    return directions
+
+
+def turn_events(directions, min_stable=10):
+    """
+    AttentionDetector's turn counting over a series of direction codes.
+    Returns (turns, counts): the frames a turn was counted and the running
+    turn count.
+
+    The first turn needs min_stable consecutive non-center frames, in any
+    mix of sides, since the last direction starts as CENTER. After that only
+    the opposite side of the last turn qualifies, so a turn is a run of at
+    least min_stable frames on one side, different from the previous turn.
+    """
+
+    directions = np.asarray(directions)
+    frames = len(directions)
+    empty = np.empty(0, dtype=np.int64)
+
+    first = np.flatnonzero(run_lengths(directions != CENTER) == min_stable)
+    if not len(first):
+        return empty, np.zeros(frames, dtype=np.int64)
+
+    first = first[0]
+    last = directions[first]
+
+    # run-length encoding of the series
+    change = np.flatnonzero(directions[1:] != directions[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [frames])))
+    values = directions[starts]
+
+    qualified = (starts > first) & (values != CENTER) & (lengths >= min_stable)
+    starts = starts[qualified]
+    values = values[qualified]
+
+    # a run on the same side as the previous turn does not count
+    turned = values != np.concatenate(([last], values[:-1]))
+
+    turns = np.concatenate(([first], starts[turned] + min_stable - 1))
+    return turns, cumulative(turns, frames)
+
+
+def yaw_change_events(yaw, threshold=0.08, initial=1.0):
+    """
+    ConfusionDetector's side-glance counting: a change is a frame whose yaw
+    differs from the previous frame's by more than threshold. The first
+    frame compares against initial. Returns (changes, counts).
+    """
+
+    yaw = np.asarray(yaw, dtype=np.float64)
+    previous = np.concatenate(([initial], yaw[:-1]))
+
+    changes = np.flatnonzero(np.abs(yaw - previous) > threshold)
+    return changes, cumulative(changes, len(yaw))
@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+from .features import LEFT_EYE, RIGHT_EYE, MOUTH, BROWS, YAW
+from .landmarker import LandmarkStage
+from .profiling import profiler
+
+
+# rigid points (nose bridge, forehead, chin, eye corners, temples) that
+# carry the head motion used to move the whole mesh
+ANCHORS = [1, 4, 6, 168, 10, 152, 33, 133, 362, 263, 234, 454, 127, 356]
+
+# points the detectors read; they move on their own (blinks, yawns, brows),
+# so each one is tracked individually instead of following the head
+FEATURE_POINTS = sorted(set(LEFT_EYE + RIGHT_EYE + MOUTH + BROWS + YAW + [159, 145, 386, 374]))
+
+TRACKED = ANCHORS + [i for i in FEATURE_POINTS if i not in ANCHORS]
+
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+)
+
+
+class AdaptiveLandmarkStage(LandmarkStage):
+    """
+    Runs FaceLandmarker on keyframes only and propagates landmarks in between
+    with sparse Lucas-Kanade optical flow, so detectors still get landmarks
+    on every frame.
+
+    The keyframe interval grows by one frame after each calm, well tracked
+    frame up to max_interval, and drops back to min_interval on fast motion,
+    lost tracks or a missing face.
+
+    Tracking only runs from the frame just before. After skip(), e.g. for a
+    frame PresenceStage gated out, or a gap of more than max_gap_ms of media
+    time, the next frame is a keyframe.
+    """
+
+    def __init__(self, num_faces=1, min_interval=1, max_interval=5,
+                 motion_threshold=0.01, min_tracked=0.7, max_gap_ms=250):
+        super().__init__(num_faces)
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.min_tracked = min_tracked
+        self.max_gap_ms = max_gap_ms
+
+        self.interval = min_interval
+        self.since_keyframe = 0
+        self.prev_gray = None
+        self.prev_timestamp = None
+        self.faces = None
+
+        self.keyframes = 0
+        self.tracked_frames = 0
+
+    def skip(self):
+        # the next frame has nothing recent to track from
+        self.faces = None
+        self.prev_gray = None
+        self.interval = self.min_interval
+
+    def process(self, frame, timestamp_ms=None, roi=None):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if (timestamp_ms is not None and self.prev_timestamp is not None
+                and timestamp_ms - self.prev_timestamp > self.max_gap_ms):
+            self.skip()
+        self.prev_timestamp = timestamp_ms
+
+        faces = None
+        if (self.faces is not None and len(self.faces)
+                and self.since_keyframe < self.interval):
+            with profiler.stage("landmarks.tracking"):
+                faces, motion = self._propagate(gray, frame.shape)
+
+            if faces is not None:
+                self.since_keyframe += 1
+                self.tracked_frames += 1
+
+                if motion > self.motion_threshold:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.interval + 1, self.max_interval)
+
+        if faces is None:
+            faces = super().process(frame, timestamp_ms, roi)
+            self.since_keyframe = 0
+            self.keyframes += 1
+
+            # a lost face or a failed track means we search every frame again
+            if not len(faces):
+                self.interval = self.min_interval
+
+        self.faces = faces
+        self.prev_gray = gray
+        return faces
+
+    def _propagate(self, gray, frame_shape):
+        """
+        Moves the previous landmarks onto this frame.
+        Returns (faces, motion) or (None, 0) when tracking is not trustworthy.
+        """
+
+        h, w = frame_shape[:2]
+        size = np.array([w, h], dtype=np.float32)
+        n_anchors = len(ANCHORS)
+
+        out = self.faces.copy()
+        motion = 0.0
+
+        for i, face in enumerate(self.faces):
+            prev_pts = (face[TRACKED, :2] * size).reshape(-1, 1, 2)
+            next_pts, status, _ = cv2.calcOpticalFlowPyrLK(
+                self.prev_gray, gray, prev_pts, None, **LK_PARAMS
+            )
+
+            good = status.ravel() == 1
+            if good.mean() < self.min_tracked or good[:n_anchors].sum() < 3:
+                return None, 0.0
+
+            prev_pts = prev_pts.reshape(-1, 2)
+            next_pts = next_pts.reshape(-1, 2)
+
+            anchor_good = good[:n_anchors]
+            matrix, inliers = cv2.estimateAffinePartial2D(
+                prev_pts[:n_anchors][anchor_good],
+                next_pts[:n_anchors][anchor_good]
+            )
+            if matrix is None or inliers.mean() < self.min_tracked:
+                return None, 0.0
+
+            # head motion moves the whole mesh
+            xy = face[:, :2] * size
+            xy = xy @ matrix[:, :2].T + matrix[:, 2]
+            out[i, :, :2] = xy / size
+            out[i, :, 2] = face[:, 2] * np.sqrt(abs(np.linalg.det(matrix[:, :2])))
+
+            # tracked points keep their own motion (eyelids, lips, brows)
+            tracked = np.array(TRACKED)[good]
+            out[i, tracked, :2] = next_pts[good] / size
+
+            shift = np.linalg.norm(next_pts[:n_anchors][anchor_good] - prev_pts[:n_anchors][anchor_good], axis=1)
+            motion = max(motion, float(np.median(shift)) / w)
+
+        return out, motion
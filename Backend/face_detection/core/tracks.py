@@ -0,0 +1,109 @@
+import numpy as np
+
+
+def face_boxes(faces):
+    """
+    (faces, 4) normalized (x0, y0, x1, y1) boxes around (faces, 478, 3) landmarks.
+    """
+
+    xy = faces[..., :2]
+    return np.concatenate([xy.min(axis=1), xy.max(axis=1)], axis=1)
+
+
+def box_iou(a, b):
+    """
+    (len(a), len(b)) intersection over union of two sets of boxes.
+    """
+
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+def _greedy(score, allowed, used_rows, used_cols, pairs):
+    # best scoring allowed pairs first, each row and column used once
+    rows, cols = np.nonzero(allowed)
+    for k in np.argsort(-score[rows, cols], kind="stable"):
+        r, c = rows[k], cols[k]
+        if r not in used_rows and c not in used_cols:
+            used_rows.add(r)
+            used_cols.add(c)
+            pairs.append((r, c))
+
+
+class FaceTracker:
+    """
+    Gives every face a track ID that stays with it from frame to frame.
+
+    Faces are matched to tracks greedily by box IoU; faces that overlap no
+    track are then matched by centroid distance, which picks up a student
+    who moved quickly or reappears after a few missed frames. Unmatched
+    faces start new tracks. A track not seen for max_missing frames expires.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_distance=0.1, max_missing=90):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missing = max_missing
+
+        self.ids = []
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.missing = []
+        self.next_id = 0
+
+    def update(self, faces):
+        """
+        Returns (ids, expired): a track ID per face, in face order, and the
+        IDs of tracks that expired on this frame.
+        """
+
+        boxes = face_boxes(faces) if len(faces) else np.empty((0, 4), dtype=np.float32)
+
+        pairs = []
+        if len(boxes) and self.ids:
+            iou = box_iou(boxes, self.boxes)
+
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            track_centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+            distance = np.linalg.norm(centers[:, None] - track_centers[None], axis=2)
+
+            used_faces, used_tracks = set(), set()
+            _greedy(iou, iou >= self.iou_threshold, used_faces, used_tracks, pairs)
+            _greedy(-distance, distance <= self.max_distance, used_faces, used_tracks, pairs)
+
+        ids = np.empty(len(boxes), dtype=np.int64)
+        matched = set()
+
+        for face, track in pairs:
+            ids[face] = self.ids[track]
+            self.boxes[track] = boxes[face]
+            self.missing[track] = 0
+            matched.add(track)
+
+        for track in range(len(self.ids)):
+            if track not in matched:
+                self.missing[track] += 1
+
+        # new tracks for the faces left over
+        matched_faces = {face for face, _ in pairs}
+        new = [face for face in range(len(boxes)) if face not in matched_faces]
+        for face in new:
+            ids[face] = self.next_id
+            self.next_id += 1
+
+        keep = [track for track in range(len(self.ids)) if self.missing[track] <= self.max_missing]
+        expired = [self.ids[track] for track in range(len(self.ids)) if track not in keep]
+
+        self.ids = [self.ids[track] for track in keep] + [int(ids[face]) for face in new]
+        self.missing = [self.missing[track] for track in keep] + [0] * len(new)
+        self.boxes = np.concatenate([self.boxes[keep], boxes[new]]).astype(np.float32)
+
+        return ids, expired
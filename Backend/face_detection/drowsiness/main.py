@@ -1,12 +1,18 @@
 import cv2
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-import os
+
+from core.features import (
+    LEFT_EYE,
+    RIGHT_EYE,
+    MOUTH,
+    to_pixels,
+    pixel_points,
+    frame_features
+)
+from core.landmarker import LandmarkStage
+from core.profiling import profiler
+from core.results import DetectorResult, NO_FACE
 
 from .utils import (
-    extract_eye_features,
-    extract_mouth_features,
     draw_eye_points,
     draw_mouth_points,
     is_sleepy
@@ -14,58 +20,129 @@ from .utils import (
 
 
 class DrowsinessDetector:
-    def __init__(self, model_path="../face_landmarker.task", consec_frames=15):
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "face_landmarker.task")
-        model_path = os.path.abspath(model_path)
+    # what step() reads, served from the shared per-frame feature cache
+    FEATURES = ["ear", "mar"]
 
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
-            num_faces=1
-        )
+    # what advance() reads on frames the scheduler does not score
+    TRACK_FEATURES = ["ear", "mar"]
 
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
-        self.frame_count = 0
+    def __init__(self, model_path="../face_landmarker.task", consec_frames=15,
+                 ear_closed=0.15, ear_drowsy=0.20, mar_yawn=0.35):
+
+        # own landmark stage, only built when used standalone
+        self.stage = None
         self.sleep_counter = 0
         self.CONSEC_FRAMES = consec_frames
 
-    def process(self, frame):
+        # eyes closed, or half closed while yawning
+        self.ear_closed = ear_closed
+        self.ear_drowsy = ear_drowsy
+        self.mar_yawn = mar_yawn
+
+        # latest compute() output
+        self.result = DetectorResult(NO_FACE)
+
+    def compute(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Scores one frame from the shared landmark array. No drawing.
+        """
+
+        if not len(faces):
+            return self.step(None, timestamp_ms)
+
+        lap = profiler.lap()
+
+        features = frame_features.get(faces, frame_shape, self.FEATURES)
+        lap("drowsiness.features")
+
+        self.step(features, timestamp_ms, faces[0])
+        lap("drowsiness.logic")
+
+        return self.result
+
+    def advance(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Keeps the closed-eye frame counter on every frame without building
+        a result, for frames a DetectorScheduler skips.
+        """
+
+        if len(faces):
+            features = frame_features.get(faces, frame_shape, self.TRACK_FEATURES)
+            self._count(features["ear"], features["mar"])
+
+    def _count(self, ear, mar):
+        if is_sleepy(ear, mar, self.ear_closed, self.ear_drowsy, self.mar_yawn):
+            self.sleep_counter += 1
+        else:
+            self.sleep_counter = 0
+
+    def step(self, features, timestamp_ms=None, landmarks=None):
         """
-        Takes a single frame.
-        Returns processed frame.
+        Advances the detector by one frame of precomputed features, keyed as
+        in core.features.FEATURE_NAMES, or None for a frame without a face.
         """
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        if features is None:
+            self.result = DetectorResult(NO_FACE, timestamp_ms=timestamp_ms)
+            return self.result
+
+        ear = features["ear"]
+        mar = features["mar"]
 
-        result = self.landmarker.detect_for_video(mp_image, self.frame_count)
-        self.frame_count += 1
+        self._count(ear, mar)
 
-        if result.face_landmarks:
-            face_landmarks = result.face_landmarks[0]
+        sleepy = self.sleep_counter >= self.CONSEC_FRAMES
+
+        self.result = DetectorResult(
+            "SLEEPY" if sleepy else "AWAKE",
+            scores={"sleepy": sleepy, "sleep_counter": self.sleep_counter},
+            features={"ear": ear, "mar": mar},
+            landmarks=landmarks,
+            timestamp_ms=timestamp_ms
+        )
+
+        return self.result
+
+    def render(self, frame, result):
+        """
+        Draws the overlay for a computed result onto frame.
+        """
 
-            ear, left_eye, right_eye = extract_eye_features(face_landmarks, frame.shape)
-            mar, mouth_points = extract_mouth_features(face_landmarks, frame.shape)
+        if result.landmarks is None:
+            return frame
 
-            cv2.putText(frame, f"EAR: {ear:.2f}", (30, 30),
+        with profiler.stage("drowsiness.overlay"):
+            points = to_pixels(result.landmarks, frame.shape)
+
+            left_eye = pixel_points(points, LEFT_EYE)
+            right_eye = pixel_points(points, RIGHT_EYE)
+            mouth_points = pixel_points(points, MOUTH)
+
+            cv2.putText(frame, f"EAR: {result.features['ear']:.2f}", (30, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
-            cv2.putText(frame, f"MAR: {mar:.2f}", (30, 65),
+            cv2.putText(frame, f"MAR: {result.features['mar']:.2f}", (30, 65),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
 
             draw_eye_points(frame, left_eye, right_eye)
             draw_mouth_points(frame, mouth_points)
 
-            if is_sleepy(ear, mar):
-                self.sleep_counter += 1
-            else:
-                self.sleep_counter = 0
-
-            if self.sleep_counter >= self.CONSEC_FRAMES:
+            if result.scores["sleepy"]:
                 cv2.putText(frame, "SLEEPY", (30, 110),
                             cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
 
         return frame
+
+    def process(self, frame, faces=None, timestamp_ms=None):
+        """
+        Standalone path: takes a single frame and optionally the shared
+        landmark array for it. Returns processed frame.
+        """
+
+        if faces is None:
+            if self.stage is None:
+                self.stage = LandmarkStage()
+            faces = self.stage.process(frame, timestamp_ms)
+
+        return self.render(frame, self.compute(faces, frame.shape, timestamp_ms))
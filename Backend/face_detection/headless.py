@@ -0,0 +1,200 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from drowsiness.main import DrowsinessDetector
+from attention.main import AttentionDetector
+from stress.main import StressDetector
+from confusion.main import ConfusionDetector
+from core.calibration import CalibrationStore
+from core.features import FEATURE_NAMES, frame_features
+from core.landmarker import LandmarkStage
+from core.session import SessionWriter, session_path
+from core.tracking import AdaptiveLandmarkStage
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+SCORE_COLUMNS = [
+    "sleepy", "turns_per_minute", "stress_score",
+    "blinks_per_min", "confusion_score"
+]
+
+COLUMNS = ["frame", "timestamp_ms", "face"] + SCORE_COLUMNS + FEATURE_NAMES
+
+
+def find_videos(path):
+    if os.path.isfile(path):
+        return [path]
+
+    return sorted(
+        os.path.join(path, name)
+        for name in os.listdir(path)
+        if name.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+
+def process_video(path, adaptive=False, student_id=None, record=None):
+    """
+    Runs every detector over a video file with no drawing and no display.
+    Returns per-frame columns and the throughput in frames per second.
+    With a student_id, saved baselines are used and updated. With a record
+    path, the landmarks are also logged there as a session file.
+    """
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+
+    stage = AdaptiveLandmarkStage() if adaptive else LandmarkStage()
+    drowsy = DrowsinessDetector()
+    store = CalibrationStore()
+    attention = AttentionDetector(student_id=student_id, store=store)
+    stress = StressDetector(student_id=student_id, store=store)
+    confusion = ConfusionDetector(student_id=student_id, store=store)
+    detectors = [drowsy, attention, stress, confusion]
+
+    log = None
+    if record:
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        log = SessionWriter(record, frame_shape)
+
+    columns = {name: [] for name in COLUMNS}
+    frame_idx = 0
+    start = time.perf_counter()
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if timestamp_ms <= 0 and frame_idx:
+            timestamp_ms = frame_idx * 1000 / fps
+
+        faces = stage.process(frame, timestamp_ms)
+        if log is not None:
+            log.append(timestamp_ms, faces)
+
+        scores = {}
+        for detector in detectors:
+            scores.update(detector.compute(faces, frame.shape, timestamp_ms).scores)
+
+        # the detectors' compute() already filled the shared memo for faces
+        features = {}
+        if len(faces):
+            features = frame_features.get(faces, frame.shape, FEATURE_NAMES)
+
+        columns["frame"].append(frame_idx)
+        columns["timestamp_ms"].append(timestamp_ms)
+        columns["face"].append(len(faces) > 0)
+
+        for name in SCORE_COLUMNS + FEATURE_NAMES:
+            value = scores.get(name, features.get(name))
+            columns[name].append(np.nan if value is None else float(value))
+
+        frame_idx += 1
+
+    cap.release()
+    if log is not None:
+        log.close()
+
+    for detector in [attention, stress, confusion]:
+        if detector.baselines.ready:
+            detector.baselines.save()
+
+    elapsed = time.perf_counter() - start
+    throughput = frame_idx / elapsed if elapsed > 0 else 0
+
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    return columns, throughput
+
+
+# ---------- WRITERS ----------
+def write_csv(path, columns):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(zip(*(columns[name].tolist() for name in COLUMNS)))
+
+
+def write_npz(path, columns):
+    np.savez_compressed(path, **columns)
+
+
+def write_parquet(path, columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+
+    pq.write_table(pa.table(columns), path)
+
+
+WRITERS = {
+    "csv": write_csv,
+    "npz": write_npz,
+    "parquet": write_parquet,
+}
+
+
+def run(path, out_dir, formats, adaptive=False, student_id=None, record=False):
+    name = os.path.splitext(os.path.basename(path))[0]
+    log_path = session_path(out_dir, name) if record else None
+
+    columns, throughput = process_video(path, adaptive, student_id, log_path)
+
+    for fmt in formats:
+        WRITERS[fmt](os.path.join(out_dir, f"{name}.{fmt}"), columns)
+
+    return path, len(columns["frame"]), throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score recorded videos without a display."
+    )
+    parser.add_argument("input", help="video file or directory of videos")
+    parser.add_argument("--out", default="scores", help="output directory")
+    parser.add_argument("--format", nargs="+", default=["csv"],
+                        choices=sorted(WRITERS), help="output formats")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="videos processed in parallel")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="run landmark inference on keyframes only")
+    parser.add_argument("--student", default=None,
+                        help="student id whose saved calibration baselines are used")
+    parser.add_argument("--record", action="store_true",
+                        help="also log landmarks to <out>/<video>.landmarks for replay")
+    args = parser.parse_args()
+
+    videos = find_videos(args.input)
+    if not videos:
+        raise SystemExit(f"No videos found in {args.input}")
+
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    total_frames = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = [pool.submit(run, v, args.out, args.format,
+                            args.adaptive, args.student, args.record) for v in videos]
+
+        for job in jobs:
+            path, frames, throughput = job.result()
+            total_frames += frames
+            print(f"{path}: {frames} frames, {throughput:.1f} fps")
+
+    elapsed = time.perf_counter() - start
+    print(f"Total: {total_frames} frames in {elapsed:.1f}s "
+          f"({total_frames / elapsed:.1f} fps)")
+
+
+if __name__ == "__main__":
+    main()
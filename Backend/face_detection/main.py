@@ -1,74 +1,258 @@
+import time
+
+#taken before the heavy imports, for the startup report
+launch = time.perf_counter()
+
 from raw.cam import RawCameraView
 from raw.landmarks import LandmarkViewer
 from drowsiness.main import DrowsinessDetector
 from attention.main import AttentionDetector
 from stress.main import StressDetector
 from confusion.main import ConfusionDetector
+from multiface import MultiFaceScorer
+from core.calibration import CalibrationStore
+from core.channel import ScoreWriter
+from core.capture import ThreadedCapture, LatencyMeter
+from core.dashboard import DashboardCompositor
+from core.features import NO_FACES
+from core.landmarker import LandmarkStage
+from core.live import LiveLandmarkEngine
+from core.presence import PresenceStage
+from core.profiling import StartupTimer, profiler
+from core.scheduler import DetectorScheduler
+from core.results import DetectorResult, NO_FACE
+from core.session import SessionWriter
+from core.tracking import AdaptiveLandmarkStage
 
 import cv2
-import numpy as np
+import os
+import threading
+
+startup = StartupTimer(launch)
+startup.mark("imports")
+
+#COGNITIVELENS_FACES=N scores up to N faces from one inference, each face
+#with its own detector state under a stable track ID
+num_faces = int(os.environ.get("COGNITIVELENS_FACES", "1"))
+multi = MultiFaceScorer() if num_faces > 1 else None
+if multi is not None and os.environ.get("COGNITIVELENS_STUDENT"):
+    raise SystemExit("COGNITIVELENS_STUDENT needs one face per camera, track IDs are not students")
+
+#one landmark stage shared by all detectors:
+#  COGNITIVELENS_LIVE=1 runs inference asynchronously in LIVE_STREAM mode,
+#  overlapping with capture and rendering; results are shown in order
+#  COGNITIVELENS_ADAPTIVE=1 runs inference on keyframes only and tracks
+#  landmarks in between
+landmark_stage = None
+live = None
+if os.environ.get("COGNITIVELENS_LIVE") == "1":
+    live = LiveLandmarkEngine(num_faces, max_in_flight=2)
+elif os.environ.get("COGNITIVELENS_ADAPTIVE") == "1":
+    landmark_stage = AdaptiveLandmarkStage(num_faces)
+else:
+    landmark_stage = LandmarkStage(num_faces)
+
+#BlazeFace runs first: no face skips the landmark stage and the detectors,
+#a face limits the landmarker to a padded crop around it.
+#multi-face mode always infers on the whole frame, the short-range detector
+#misses faces at the back of a classroom
+presence = PresenceStage() if multi is None else None
+
+#models are built on a background thread while the camera opens,
+#mediapipe is only imported there
+def warm_up():
+    (live or landmark_stage).load()
+    if presence is not None:
+        presence.load()
+    startup.mark("models")
+
+
+threading.Thread(target=warm_up, daemon=True).start()
+
+#while idle the loop slows down to save CPU
+IDLE_WAIT_MS = 100
 
 raw_view = RawCameraView()
 landmark_view = LandmarkViewer()
+#COGNITIVELENS_STUDENT=<id> loads that student's saved baselines and
+#skips calibration; new baselines are saved on exit
+student_id = os.environ.get("COGNITIVELENS_STUDENT")
+calibration = CalibrationStore()
+
 drowsy = DrowsinessDetector()
-attention = AttentionDetector()
-stress = StressDetector()
-confusion = ConfusionDetector()
+attention = AttentionDetector(student_id=student_id, store=calibration)
+stress = StressDetector(student_id=student_id, store=calibration)
+confusion = ConfusionDetector(student_id=student_id, store=calibration)
+
+#panel order on the dashboard: raw, landmarks, then these
+detectors = [drowsy, attention, stress, confusion]
+
+#COGNITIVELENS_BUDGET_MS=<ms> caps detector time per frame: under load confusion,
+#then stress, then attention are scored every 2nd, 4th... frame and reuse their
+#last result, their blink and turn counting still sees every frame; drowsiness
+#always runs on every frame
+budget_ms = os.environ.get("COGNITIVELENS_BUDGET_MS")
+scheduler = DetectorScheduler(
+    [("drowsiness", drowsy, 0), ("attention", attention, 1),
+     ("stress", stress, 2), ("confusion", confusion, 3)],
+    budget_ms=float(budget_ms) if budget_ms else None
+)
 
-cap = cv2.VideoCapture(0)
+#camera is read on its own thread, processing always takes the newest frame
+cap = ThreadedCapture(0).start()
+latency = LatencyMeter()
 
-#tile size
-TILE_W = 420
-TILE_H = 320
+#per-frame scores for the analytics window (python -m analytics.main from Backend),
+#written to shared memory so neither process waits on the other
+scores = ScoreWriter()
 
-def resize_frame(frame):
-    return cv2.resize(frame, (TILE_W, TILE_H))
+#COGNITIVELENS_RECORD=<file> logs every frame's landmarks for offline replay
+session_log = None
+if os.environ.get("COGNITIVELENS_RECORD"):
+    frame_shape = (int(cap.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+    session_log = SessionWriter(os.environ["COGNITIVELENS_RECORD"], frame_shape)
+
+#canvas allocated once, panels are resized straight into it
+dashboard = DashboardCompositor()
 
 #make window resizable
 cv2.namedWindow("CognitiveLens Dashboard", cv2.WINDOW_NORMAL)
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+start_time = None
+
+
+def show(captured, timestamp_ms, faces):
+    """
+    Scores, draws and displays one frame whose landmarks are ready.
+    """
+
+    frame = captured.frame
+    lap = profiler.lap()
+
+    if session_log is not None:
+        session_log.append(timestamp_ms, faces)
 
-    raw_frame = raw_view.process(frame.copy())
-    landmark_frame = landmark_view.process(frame.copy())
-    sleep_frame = drowsy.process(frame.copy())
-    attention_frame = attention.process(frame.copy())
-    stress_frame = stress.process(frame.copy())
-    # placeholder_frame = raw_view.process(frame.copy())
-    confusion_frame = confusion.process(frame.copy())
+    #scores are computed whenever a face is in view, drawing only happens for visible panels
+    ids = None
+    if multi is not None:
+        ids, tracks = multi.compute(faces, frame.shape, timestamp_ms)
 
-    raw_frame = resize_frame(raw_frame)
-    landmark_frame = resize_frame(landmark_frame)
-    sleep_frame = resize_frame(sleep_frame)
-    attention_frame = resize_frame(attention_frame)
-    stress_frame = resize_frame(stress_frame)
-    confusion_frame = resize_frame(confusion_frame)
+        #panels and the analytics channel follow the oldest track in view
+        if len(ids):
+            results = tracks[int(ids.min())]
+        else:
+            results = [DetectorResult(NO_FACE, timestamp_ms=timestamp_ms)] * len(detectors)
+    elif not len(faces):
+        results = [DetectorResult(NO_FACE, timestamp_ms=timestamp_ms)] * len(detectors)
+    else:
+        results = scheduler.run(faces, frame.shape, timestamp_ms)
+    lap("main.compute")
 
-    top_row = np.hstack((raw_frame, landmark_frame, sleep_frame))
-    bottom_row = np.hstack((attention_frame, stress_frame, confusion_frame))
-    dashboard = np.vstack((top_row, bottom_row))
+    scores.write_results(timestamp_ms, results)
 
-    #fit to screen size
-    screen_w = 1920
-    screen_h = 1080
+    #overlays are rendered straight onto each panel's tile, no frame copies
+    if dashboard.visible[0]:
+        raw_view.process(dashboard.blit(0, frame))
 
-    dash_h, dash_w = dashboard.shape[:2]
-    scale_w = screen_w / dash_w
-    scale_h = screen_h / dash_h
-    scale = min(scale_w, scale_h)
+    if dashboard.visible[1]:
+        landmark_view.render(dashboard.blit(1, frame), faces, ids)
 
-    new_w = int(dash_w * scale)
-    new_h = int(dash_h * scale)
+    for index, (detector, result) in enumerate(zip(detectors, results), 2):
+        if dashboard.visible[index]:
+            detector.render(dashboard.blit(index, frame), result)
+    lap("main.render")
 
-    dashboard = cv2.resize(dashboard, (new_w, new_h))
+    canvas = dashboard.canvas
 
-    cv2.imshow("CognitiveLens Dashboard", dashboard)
+    cv2.putText(canvas,
+                f"Latency: {latency.average():.0f} ms  Dropped: {cap.frames_dropped}",
+                (20, canvas.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
 
-    if cv2.waitKey(1) == 27:
+    if scheduler.budget_ms is not None:
+        cv2.putText(canvas, scheduler.summary(),
+                    (20, canvas.shape[0] - 50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+    profiler.draw(canvas)
+
+    cv2.imshow("CognitiveLens Dashboard", canvas)
+    lap("main.display")
+
+    #capture to display latency
+    latency.record(captured.timestamp)
+
+    profiler.tick()
+    profiler.print_every(5.0)
+
+    if "first frame" not in startup.marks:
+        startup.mark("first frame")
+        print(startup.report())
+
+
+#per-stage timings: COGNITIVELENS_PROFILE=1 or press "p"
+#keys 1-6 show/hide panels
+while True:
+    with profiler.stage("capture.wait"):
+        captured = cap.read()
+    if captured is None:
         break
 
+    frame = captured.frame
+
+    #capture time in ms since the first frame
+    if start_time is None:
+        start_time = captured.timestamp
+        startup.mark("camera")
+    timestamp_ms = (captured.timestamp - start_time) * 1000
+
+    roi = None
+    if presence is not None:
+        roi = presence.process(frame, timestamp_ms)
+    no_face = presence is not None and roi is None
+
+    #frames whose landmarks are ready, oldest first
+    if live is not None:
+        if no_face:
+            live.skip(frame, timestamp_ms, captured)
+        else:
+            live.submit(frame, timestamp_ms, roi, captured)
+        ready = [(r.tag, r.timestamp_ms, r.faces) for r in live.poll()]
+    elif no_face:
+        landmark_stage.skip()
+        ready = [(captured, timestamp_ms, NO_FACES)]
+    else:
+        with profiler.stage("main.landmarks"):
+            faces = landmark_stage.process(frame, timestamp_ms, roi)
+        ready = [(captured, timestamp_ms, faces)]
+
+    for captured, timestamp_ms, faces in ready:
+        show(captured, timestamp_ms, faces)
+
+    key = cv2.waitKey(IDLE_WAIT_MS if presence is not None and presence.idle else 1)
+    if key == 27:
+        break
+    if key == ord("p"):
+        profiler.enable(not profiler.enabled)
+    if ord("1") <= key <= ord("6"):
+        dashboard.toggle(key - ord("1"))
+
 cap.release()
 cv2.destroyAllWindows()
+scores.close()
+if session_log is not None:
+    session_log.close()
+
+for detector in [attention, stress, confusion]:
+    if detector.baselines.ready:
+        detector.baselines.save()
+
+if live is not None:
+    live.close()
+    print(f"Live engine: {live.frames_submitted} submitted, "
+          f"{live.frames_refused} refused, {live.frames_dropped} dropped")
+
+print(f"Frames read: {cap.frames_read}, dropped: {cap.frames_dropped}")
+print(f"Latency avg: {latency.average():.1f} ms, worst: {latency.worst():.1f} ms")
+
+if scheduler.budget_ms is not None:
+    print(f"Detectors: {scheduler.summary()}")
+    print("  " + ", ".join(f"{name} {cost:.2f} ms" for name, cost in scheduler.costs().items()))
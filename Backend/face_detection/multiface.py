@@ -0,0 +1,72 @@
+import numpy as np
+
+from drowsiness.main import DrowsinessDetector
+from attention.main import AttentionDetector
+from stress.main import StressDetector
+from confusion.main import ConfusionDetector
+from core.features import FEATURE_NAMES, compute_features, to_pixels
+from core.profiling import profiler
+from core.tracks import FaceTracker
+
+
+class MultiFaceScorer:
+    """
+    Scores every face in the frame with its own detector state.
+
+    Faces are matched to stable track IDs by a FaceTracker; each track owns
+    a drowsiness, attention, stress and confusion detector, created when the
+    track starts and dropped when it expires. Features for all faces come
+    from one batched compute_features call, then each track's detectors
+    step() on their face's row. Tracks not in view step with no face, like
+    the single-face path on an empty frame. Track IDs only last a session,
+    so every track calibrates afresh and no baselines are saved.
+    """
+
+    def __init__(self, max_missing=90, **tracker_options):
+        self.tracker = FaceTracker(max_missing=max_missing, **tracker_options)
+        self.tracks = {}
+
+    def _new_track(self):
+        return [DrowsinessDetector(), AttentionDetector(), StressDetector(), ConfusionDetector()]
+
+    def compute(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Returns (ids, results): the track ID of each face, in face order, and
+        {track_id: [drowsiness, attention, stress, confusion results]} for
+        every live track.
+        """
+
+        lap = profiler.lap()
+
+        ids, expired = self.tracker.update(faces)
+        for track_id in expired:
+            del self.tracks[track_id]
+
+        results = {}
+
+        if len(faces):
+            features = compute_features(to_pixels(faces, frame_shape))
+
+            # same scalar types as each detector's own compute() path
+            values = [
+                features[name].tolist() if features[name].dtype == np.float64 else features[name]
+                for name in FEATURE_NAMES
+            ]
+            lap("multiface.features")
+
+            for j, track_id in enumerate(ids.tolist()):
+                detectors = self.tracks.get(track_id)
+                if detectors is None:
+                    detectors = self.tracks[track_id] = self._new_track()
+
+                face_features = {name: v[j] for name, v in zip(FEATURE_NAMES, values)}
+                results[track_id] = [
+                    detector.step(face_features, timestamp_ms, faces[j]) for detector in detectors
+                ]
+
+        for track_id, detectors in self.tracks.items():
+            if track_id not in results:
+                results[track_id] = [detector.step(None, timestamp_ms) for detector in detectors]
+        lap("multiface.logic")
+
+        return ids, results
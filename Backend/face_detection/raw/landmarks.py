@@ -1,45 +1,31 @@
 import cv2
-import mediapipe as mp
-import os
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+
+from core.features import to_pixels
+from core.landmarker import LandmarkStage
+from core.profiling import profiler
 
 
 class LandmarkViewer:
     def __init__(self):
-        # Absolute safe path to model (parent folder)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "face_landmarker.task")
-        model_path = os.path.abspath(model_path)
-
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
-            num_faces=1
-        )
+        # own landmark stage, only built when used standalone
+        self.stage = None
 
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
-        self.frame_count = 0
-
-    def process(self, frame):
+    def render(self, frame, faces, ids=None):
         """
-        Takes a frame and returns frame with 468 landmarks drawn.
+        Draws every landmark of every face onto frame, labelled with its
+        track ID when ids are given.
         """
 
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-
-        result = self.landmarker.detect_for_video(mp_image, self.frame_count)
-        self.frame_count += 1
-
-        if result.face_landmarks:
-            for face_landmarks in result.face_landmarks:
-                for landmark in face_landmarks:
-                    x = int(landmark.x * frame.shape[1])
-                    y = int(landmark.y * frame.shape[0])
+        with profiler.stage("landmark_view.overlay"):
+            for i, points in enumerate(to_pixels(faces, frame.shape).astype(int).tolist()):
+                for x, y in points:
                     cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
 
+                if ids is not None:
+                    x, y = min(p[0] for p in points), min(p[1] for p in points)
+                    cv2.putText(frame, f"#{ids[i]}", (x, max(0, y - 8)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
         cv2.putText(
             frame,
             "LANDMARK VIEW",
@@ -51,3 +37,15 @@ class LandmarkViewer:
         )
 
         return frame
+
+    def process(self, frame, faces=None, timestamp_ms=None):
+        """
+        Takes a frame and returns frame with 468 landmarks drawn.
+        """
+
+        if faces is None:
+            if self.stage is None:
+                self.stage = LandmarkStage()
+            faces = self.stage.process(frame, timestamp_ms)
+
+        return self.render(frame, faces)
@@ -0,0 +1,206 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from drowsiness.main import DrowsinessDetector
+from attention.main import AttentionDetector
+from stress.main import StressDetector
+from confusion.main import ConfusionDetector
+from core.features import FEATURE_NAMES, compute_features, to_pixels
+from core.session import SESSION_EXTENSION, SessionReader
+from headless import SCORE_COLUMNS, WRITERS
+
+
+SESSION_EXTENSIONS = (SESSION_EXTENSION, ".npz")
+
+
+def is_session(path):
+    """
+    True for a session log or an NPZ holding a "landmarks" array. Score and
+    label NPZs written next to the sessions are not sessions.
+    """
+
+    if path.endswith(SESSION_EXTENSION):
+        return True
+
+    with np.load(path) as data:
+        return "landmarks" in data.files
+
+
+def find_sessions(path):
+    if os.path.isfile(path):
+        return [path]
+
+    sessions = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(SESSION_EXTENSIONS):
+            continue
+
+        full = os.path.join(path, name)
+        if is_session(full):
+            sessions.append(full)
+        else:
+            print(f"{full}: no landmarks, skipped")
+
+    return sessions
+
+
+def load_session(path, frame_shape=None, fps=30):
+    """
+    Returns (timestamps_ms, present, landmarks, frame_shape) from a session
+    log or an NPZ holding "landmarks" (frames, 478, 3) and optionally
+    "timestamp_ms", "face" and "frame_shape". frame_shape overrides the
+    stored one.
+    """
+
+    if path.endswith(SESSION_EXTENSION):
+        session = SessionReader(path)
+        timestamps, present, landmarks = session.slice()
+        return timestamps, present, landmarks, frame_shape or session.frame_shape
+
+    data = np.load(path)
+    if "landmarks" not in data.files:
+        raise ValueError(f"{path} holds no \"landmarks\" array, not a landmark session")
+    landmarks = data["landmarks"]
+
+    if "timestamp_ms" in data:
+        timestamps = data["timestamp_ms"]
+    else:
+        timestamps = np.arange(len(landmarks)) * 1000 / fps
+
+    present = data["face"] if "face" in data else np.ones(len(landmarks), dtype=bool)
+
+    if frame_shape is None and "frame_shape" in data:
+        frame_shape = tuple(int(v) for v in data["frame_shape"][:2])
+
+    return timestamps, present, landmarks, frame_shape
+
+
+def replay(timestamps, present, landmarks, frame_shape, chunk=4096):
+    """
+    Runs every detector over stored landmarks: no decode, no inference and
+    no drawing. Features are computed for a chunk of frames at once, then
+    each detector's step() runs its state machine per frame.
+    Returns the same columns as headless and the throughput in frames per second.
+    """
+
+    if frame_shape is None:
+        raise ValueError("frame size unknown, pass frame_shape")
+
+    drowsy = DrowsinessDetector()
+    attention = AttentionDetector()
+    stress = StressDetector()
+    confusion = ConfusionDetector()
+    detectors = [drowsy, attention, stress, confusion]
+
+    frames = len(timestamps)
+    columns = {name: np.full(frames, np.nan) for name in SCORE_COLUMNS + FEATURE_NAMES}
+    columns["frame"] = np.arange(frames)
+    columns["timestamp_ms"] = np.asarray(timestamps, dtype=np.float64)
+    columns["face"] = np.asarray(present, dtype=bool)
+
+    start = time.perf_counter()
+
+    for first in range(0, frames, chunk):
+        last = min(first + chunk, frames)
+
+        # frames without a face hold zeros, their features are discarded
+        points = to_pixels(np.asarray(landmarks[first:last], dtype=np.float32), frame_shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features = compute_features(points)
+
+        for name in FEATURE_NAMES:
+            values = np.asarray(features[name], dtype=np.float64)
+            columns[name][first:last] = np.where(columns["face"][first:last], values, np.nan)
+
+        # same scalar types as the single-frame path (float32 scalars, ratios
+        # as python floats) so the state machines give bit-identical scores
+        values = [
+            features[name].tolist() if features[name].dtype == np.float64 else features[name]
+            for name in FEATURE_NAMES
+        ]
+
+        for i in range(first, last):
+            timestamp_ms = columns["timestamp_ms"][i]
+
+            frame_features = None
+            if columns["face"][i]:
+                j = i - first
+                frame_features = {name: v[j] for name, v in zip(FEATURE_NAMES, values)}
+
+            scores = {}
+            for detector in detectors:
+                scores.update(detector.step(frame_features, timestamp_ms).scores)
+
+            for name in SCORE_COLUMNS:
+                value = scores.get(name)
+                if value is not None:
+                    columns[name][i] = value
+
+    elapsed = time.perf_counter() - start
+    throughput = frames / elapsed if elapsed > 0 else 0
+
+    return columns, throughput
+
+
+def run(path, out_dir, formats, frame_shape=None):
+    timestamps, present, landmarks, frame_shape = load_session(path, frame_shape)
+    columns, throughput = replay(timestamps, present, landmarks, frame_shape)
+
+    # keep the source extension: v.landmarks and v.npz must not write the
+    # same output, nor may an output replace an input in the same directory
+    name = os.path.basename(path)
+
+    for fmt in formats:
+        WRITERS[fmt](os.path.join(out_dir, f"{name}.{fmt}"), columns)
+
+    return path, len(columns["frame"]), throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rerun the detectors on recorded landmarks."
+    )
+    parser.add_argument("input", help="session log / NPZ file or a directory of them")
+    parser.add_argument("--out", default="replay",
+                        help="output directory, <session file name>.<format> per session")
+    parser.add_argument("--format", nargs="+", default=["csv"],
+                        choices=sorted(WRITERS), help="output formats")
+    parser.add_argument("--frame-size", default=None, metavar="WxH",
+                        help="frame size when the input does not store it")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="sessions replayed in parallel")
+    args = parser.parse_args()
+
+    frame_shape = None
+    if args.frame_size:
+        width, height = (int(v) for v in args.frame_size.lower().split("x"))
+        frame_shape = (height, width)
+
+    sessions = find_sessions(args.input)
+    if not sessions:
+        raise SystemExit(f"No sessions found in {args.input}")
+
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    total_frames = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = [pool.submit(run, s, args.out, args.format, frame_shape) for s in sessions]
+
+        for job in jobs:
+            path, frames, throughput = job.result()
+            total_frames += frames
+            print(f"{path}: {frames} frames, {throughput:.0f} fps")
+
+    elapsed = time.perf_counter() - start
+    print(f"Total: {total_frames} frames in {elapsed:.1f}s "
+          f"({total_frames / elapsed:.0f} fps)")
+
+
+if __name__ == "__main__":
+    main()
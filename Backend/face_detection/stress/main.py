@@ -1,126 +1,203 @@
 import cv2
-import os
 import time
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-
-from .utils import (
-    compute_brow_distance,
-    compute_lip_ratio,
-    compute_ear
+
+from core.calibration import Baselines
+from core.features import (
+    LEFT_EYE,
+    RIGHT_EYE,
+    MOUTH,
+    to_pixels,
+    pixel_points,
+    frame_features
 )
+from core.landmarker import LandmarkStage
+from core.profiling import profiler
+from core.rates import WindowCounter
+from core.results import DetectorResult, NO_FACE, CALIBRATING
 
 
 class StressDetector:
-    def __init__(self, calibration_frames=50):
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "face_landmarker.task")
-        model_path = os.path.abspath(model_path)
+    FEATURES = ["brow_distance", "mar", "ear"]
 
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
-            num_faces=1
-        )
+    # what advance() reads on frames the scheduler does not score
+    TRACK_FEATURES = ["ear"]
 
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+    def __init__(self, calibration_frames=50, student_id=None, store=None,
+                 ear_threshold=0.22, reopen_threshold=0.25, rate_window=60.0):
 
-        self.frame_count = 0
-        self.start_time = time.time()
+        # own landmark stage, only built when used standalone
+        self.stage = None
 
-        # Calibration for brow + lip only
-        self.calibration_frames = calibration_frames
-        self.calib_count = 0
+        self.start_time = None
 
-        self.brow_sum = 0
-        self.lip_sum = 0
+        # Calibration for brow + lip only, saved baselines for student_id skip it
+        self.calibration_frames = calibration_frames
+        self.baselines = Baselines("stress", ["baseline_brow", "baseline_lip"],
+                                   calibration_frames, student_id, store)
 
         self.baseline_brow = None
         self.baseline_lip = None
+        if self.baselines.ready:
+            self._update_baselines()
 
         # Blink system (simple + reliable)
+        self.EAR_THRESHOLD = ear_threshold  # adjust between 0.20–0.24
+        self.REOPEN_THRESHOLD = reopen_threshold
         self.blink_counter = 0
         self.eye_state = "OPEN"
 
-    def process(self, frame):
+        # blinks/min over the last rate_window seconds of media time
+        self.blink_window = WindowCounter(rate_window)
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        # latest compute() output
+        self.result = DetectorResult(NO_FACE)
 
-        result = self.landmarker.detect_for_video(mp_image, self.frame_count)
-        self.frame_count += 1
+    def compute(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Scores one frame from the shared landmark array. No drawing.
+        """
 
-        if result.face_landmarks:
+        if not len(faces):
+            return self.step(None, timestamp_ms)
 
-            landmarks = result.face_landmarks[0]
+        lap = profiler.lap()
 
-            brow_dist, lb, rb, le, re = compute_brow_distance(
-                landmarks, frame.shape
-            )
-            lip_ratio, top, bottom, left, right = compute_lip_ratio(
-                landmarks, frame.shape
-            )
-            ear, eye_points = compute_ear(
-                landmarks, frame.shape
-            )
+        features = frame_features.get(faces, frame_shape, self.FEATURES)
+        lap("stress.features")
 
-            # ---------- CALIBRATION ----------
-            if self.baseline_brow is None:
+        self.step(features, timestamp_ms, faces[0])
+        lap("stress.logic")
 
-                self.brow_sum += brow_dist
-                self.lip_sum += lip_ratio
-                self.calib_count += 1
+        return self.result
 
-                cv2.putText(frame, "Calibrating Stress...", (30, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+    def advance(self, faces, frame_shape, timestamp_ms=None):
+        """
+        Keeps the blink hysteresis on every frame without scoring it, for
+        frames a DetectorScheduler skips. self.result is left as it was.
+        """
 
-                if self.calib_count >= self.calibration_frames:
-                    self.baseline_brow = self.brow_sum / self.calibration_frames
-                    self.baseline_lip = self.lip_sum / self.calibration_frames
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
 
-                return frame
+        if len(faces) and self.baseline_brow is not None:
+            features = frame_features.get(faces, frame_shape, self.TRACK_FEATURES)
+            self._blink(features["ear"], now)
+
+    def _blink(self, ear, now):
+        if self.eye_state == "OPEN" and ear < self.EAR_THRESHOLD:
+            self.eye_state = "CLOSED"
+
+        elif self.eye_state == "CLOSED" and ear > self.REOPEN_THRESHOLD:
+            self.blink_counter += 1
+            self.blink_window.add(now)
+            self.eye_state = "OPEN"
+
+    def step(self, features, timestamp_ms=None, landmarks=None):
+        """
+        Advances the detector by one frame of precomputed features, keyed as
+        in core.features.FEATURE_NAMES, or None for a frame without a face.
+        """
+
+        # frame timestamps drive the clock when given, wall clock otherwise
+        now = time.time() if timestamp_ms is None else timestamp_ms / 1000
+        if self.start_time is None:
+            self.start_time = now
+
+        if features is None:
+            self.result = DetectorResult(NO_FACE, timestamp_ms=timestamp_ms)
+            return self.result
+
+        brow_dist = features["brow_distance"]
+        lip_ratio = features["mar"]
+        ear = features["ear"]
+
+        features = {"brow_distance": brow_dist, "lip_ratio": lip_ratio, "ear": ear}
+
+        # ---------- CALIBRATION ----------
+        if self.baseline_brow is None:
 
-            # ---------- BROW SCORE ----------
-            brow_deviation = max(0, self.baseline_brow - brow_dist)
-            brow_score = min(100, (brow_deviation / self.baseline_brow) * 200)
+            if self.baselines.add({"baseline_brow": brow_dist, "baseline_lip": lip_ratio}):
+                self._update_baselines()
 
-            # ---------- LIP SCORE ----------
-            lip_deviation = max(0, self.baseline_lip - lip_ratio)
-            lip_score = min(100, (lip_deviation / self.baseline_lip) * 250)
+            self.result = DetectorResult(CALIBRATING, features=features,
+                                         landmarks=landmarks, timestamp_ms=timestamp_ms)
+            return self.result
 
-            # ---------- BLINK DETECTION (EAR FIXED THRESHOLD) ----------
+        # ---------- BROW SCORE ----------
+        brow_deviation = max(0, self.baseline_brow - brow_dist)
+        brow_score = min(100, (brow_deviation / self.baseline_brow) * 200)
 
-            EAR_THRESHOLD = 0.22  # adjust between 0.20–0.24
-            REOPEN_THRESHOLD = 0.25
+        # ---------- LIP SCORE ----------
+        lip_deviation = max(0, self.baseline_lip - lip_ratio)
+        lip_score = min(100, (lip_deviation / self.baseline_lip) * 250)
 
-            if self.eye_state == "OPEN" and ear < EAR_THRESHOLD:
-                self.eye_state = "CLOSED"
+        # ---------- BLINK DETECTION (EAR FIXED THRESHOLD) ----------
+        self._blink(ear, now)
 
-            elif self.eye_state == "CLOSED" and ear > REOPEN_THRESHOLD:
-                self.blink_counter += 1
-                self.eye_state = "OPEN"
+        elapsed_time = self.blink_window.elapsed(now, self.start_time)
+        blinks_per_min = (
+            self.blink_window.count(now) * 60 / elapsed_time
+            if elapsed_time > 0 else 0
+        )
+
+        blink_score = min(100, blinks_per_min * 3)
+
+        # ---------- FINAL SCORE ----------
+        stress_score = (
+            0.40 * brow_score +
+            0.30 * lip_score +
+            0.30 * blink_score
+        )
 
-            elapsed_time = time.time() - self.start_time
-            blinks_per_min = (
-                self.blink_counter * 60 / elapsed_time
-                if elapsed_time > 0 else 0
-            )
+        stress_score = min(100, stress_score)
+
+        features["baseline_brow"] = self.baseline_brow
+        features["baseline_lip"] = self.baseline_lip
+
+        # refine the baselines online with typical frames
+        self.baselines.add({"baseline_brow": brow_dist, "baseline_lip": lip_ratio})
+        self._update_baselines()
+
+        self.result = DetectorResult(
+            self.eye_state,
+            scores={
+                "stress_score": stress_score,
+                "blinks_per_min": blinks_per_min,
+                "blink_count": self.blink_counter
+            },
+            features=features,
+            landmarks=landmarks,
+            timestamp_ms=timestamp_ms
+        )
+
+        return self.result
 
-            blink_score = min(100, blinks_per_min * 3)
+    def _update_baselines(self):
+        self.baseline_brow = self.baselines["baseline_brow"]
+        self.baseline_lip = self.baselines["baseline_lip"]
 
-            # ---------- FINAL SCORE ----------
-            stress_score = (
-                0.40 * brow_score +
-                0.30 * lip_score +
-                0.30 * blink_score
-            )
+    def render(self, frame, result):
+        """
+        Draws the overlay for a computed result onto frame.
+        """
 
-            stress_score = min(100, stress_score)
+        if result.landmarks is None:
+            return frame
+
+        with profiler.stage("stress.overlay"):
+            if result.state == CALIBRATING:
+                cv2.putText(frame, "Calibrating Stress...", (30, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                return frame
 
             # ---------- DRAW MARKERS ----------
+            points = to_pixels(result.landmarks, frame.shape)
+
+            lb, rb = pixel_points(points, [105, 334])
+            top, bottom, left, right = pixel_points(points, MOUTH)
+            eye_points = pixel_points(points, LEFT_EYE + RIGHT_EYE)
 
             # Eyes
             for p in eye_points:
@@ -135,16 +212,30 @@ class StressDetector:
                 cv2.circle(frame, p, 4, (0, 255, 255), -1)
 
             # ---------- TEXT ----------
-            cv2.putText(frame, f"Stress: {stress_score:.0f}/100", (30, 60),
+            scores = result.scores
+
+            cv2.putText(frame, f"Stress: {scores['stress_score']:.0f}/100", (30, 60),
                         cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 255), 3)
 
-            cv2.putText(frame, f"EAR: {ear:.3f}", (30, 95),
+            cv2.putText(frame, f"EAR: {result.features['ear']:.3f}", (30, 95),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
 
-            cv2.putText(frame, f"Blinks/min: {blinks_per_min:.1f}", (30, 125),
+            cv2.putText(frame, f"Blinks/min: {scores['blinks_per_min']:.1f}", (30, 125),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
 
-            cv2.putText(frame, f"Total Blinks: {self.blink_counter}", (30, 155),
+            cv2.putText(frame, f"Total Blinks: {scores['blink_count']}", (30, 155),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 255, 200), 2)
 
         return frame
+
+    def process(self, frame, faces=None, timestamp_ms=None):
+        """
+        Standalone path: compute and render in one call.
+        """
+
+        if faces is None:
+            if self.stage is None:
+                self.stage = LandmarkStage()
+            faces = self.stage.process(frame, timestamp_ms)
+
+        return self.render(frame, self.compute(faces, frame.shape, timestamp_ms))
@@ -0,0 +1,403 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.calibration import baseline_series
+from core.features import FEATURE_NAMES, compute_features, to_pixels
+from core.temporal import (
+    blink_events,
+    head_directions,
+    per_minute,
+    sleep_runs,
+    turn_events,
+    yaw_change_events
+)
+from replay import SESSION_EXTENSIONS, find_sessions, load_session
+
+
+# name: (low, high, current default)
+PARAMETERS = {
+    "drowsiness.ear_closed": (0.10, 0.20, 0.15),
+    "drowsiness.ear_drowsy": (0.15, 0.25, 0.20),
+    "drowsiness.mar_yawn": (0.25, 0.50, 0.35),
+    "stress.ear_threshold": (0.18, 0.26, 0.22),
+    "stress.reopen_threshold": (0.22, 0.30, 0.25),
+    "attention.deviation_threshold": (0.15, 0.45, 0.30),
+    "confusion.inward_weight": (0.0, 0.5, 0.30),
+    "confusion.asymmetry_weight": (0.0, 0.5, 0.15),
+    "confusion.tilt_weight": (0.0, 0.5, 0.20),
+    "confusion.squint_weight": (0.0, 0.5, 0.20),
+    "confusion.yaw_weight": (0.0, 0.5, 0.15),
+}
+
+# (lower, higher) parameters that must stay in order. The blink hysteresis
+# needs the eye to reopen above where it closed, otherwise
+# temporal.blink_events no longer matches StressDetector
+ORDERED = [("stress.ear_threshold", "stress.reopen_threshold")]
+
+# per-frame labels are compared with F1, event labels by count
+FRAME_LABELS = ["sleepy", "stressed", "confused"]
+COUNT_LABELS = ["blinks", "turns"]
+
+# scores at or above this count as stressed / confused
+SCORE_CUTOFF = 50
+
+# calibration lengths and fixed constants of the detectors
+ATTENTION_CALIBRATION = 40
+STRESS_CALIBRATION = 50
+CONFUSION_CALIBRATION = 60
+CONSEC_FRAMES = 15
+MIN_STABLE_FRAMES = 10
+
+
+# ---------- SESSIONS ----------
+def load_labels(path):
+    """
+    Labels come from the session NPZ itself or a <name>.labels.npz sidecar.
+    """
+
+    name = path
+    for ext in SESSION_EXTENSIONS:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+
+    labels = {}
+    for source in (path, name + ".labels.npz"):
+        if source.endswith(".npz") and os.path.exists(source):
+            with np.load(source) as data:
+                labels.update({k: data[k] for k in FRAME_LABELS + COUNT_LABELS if k in data})
+
+    return labels
+
+
+def prepare(path, frame_shape=None, chunk=4096):
+    """
+    Computes everything that does not depend on the swept parameters, once
+    per session: features on face frames, the detectors' baselines per
+    scored frame (calibration plus online refinement) and labels.
+    """
+
+    timestamps, present, landmarks, frame_shape = load_session(path, frame_shape)
+    if frame_shape is None:
+        raise ValueError(f"{path}: frame size unknown, pass --frame-size")
+
+    faces = np.flatnonzero(present)
+    features = {name: [] for name in FEATURE_NAMES}
+
+    for first in range(0, len(faces), chunk):
+        points = to_pixels(np.asarray(landmarks[faces[first:first + chunk]], dtype=np.float32),
+                           frame_shape)
+        for name, values in compute_features(points).items():
+            features[name].append(values)
+
+    features = {
+        name: np.concatenate(values) if values else np.empty(0)
+        for name, values in features.items()
+    }
+
+    # frames start counting at the first frame, with or without a face
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+
+    # same scalar types as the detectors feed their baselines
+    attention = baseline_series({"yaw": features["yaw_ratio"].tolist()}, ATTENTION_CALIBRATION)
+    stress = baseline_series({"brow": features["brow_distance"], "lip": features["mar"].tolist()},
+                             STRESS_CALIBRATION)
+    confusion = baseline_series({"inward": features["brow_asymmetry"], "ear": features["ear"]},
+                                CONFUSION_CALIBRATION)
+
+    return {
+        "path": path,
+        "frames": len(timestamps),
+        "faces": faces,
+        "timestamps": timestamps[faces],
+        "start_ms": timestamps[0] if len(timestamps) else 0.0,
+        "features": features,
+        "baseline_yaw": attention["yaw"],
+        "baseline_brow": stress["brow"],
+        "baseline_lip": stress["lip"],
+        "baseline_inward": confusion["inward"],
+        "baseline_ear": confusion["ear"],
+        "labels": load_labels(path),
+    }
+
+
+# ---------- EVALUATION ----------
+def f1(predicted, actual):
+    predicted = np.asarray(predicted, dtype=bool)
+    actual = np.asarray(actual, dtype=bool)
+
+    tp = np.count_nonzero(predicted & actual)
+    denominator = np.count_nonzero(predicted) + np.count_nonzero(actual)
+    return 2 * tp / denominator if denominator else 1.0
+
+
+def count_accuracy(predicted, actual):
+    actual = float(np.sum(actual))
+    return max(0.0, 1 - abs(predicted - actual) / max(actual, 1.0))
+
+
+def score_session(session, params):
+    """
+    Whole-session detector outputs for one configuration, as per-frame
+    arrays over all frames (False / NaN where the detector had no score)
+    plus blink and turn totals. Baselines follow the detectors' online
+    refinement, as prepared per session.
+    """
+
+    frames = session["frames"]
+    faces = session["faces"]
+    feats = session["features"]
+    timestamps = session["timestamps"]
+    start_ms = session["start_ms"]
+
+    out = {
+        "sleepy": np.zeros(frames, dtype=bool),
+        "stress_score": np.full(frames, np.nan),
+        "confusion_score": np.full(frames, np.nan),
+    }
+
+    # drowsiness
+    _, sleepy, _ = sleep_runs(
+        feats["ear"], feats["mar"], CONSEC_FRAMES,
+        params["drowsiness.ear_closed"], params["drowsiness.ear_drowsy"],
+        params["drowsiness.mar_yawn"]
+    )
+    out["sleepy"][faces] = sleepy
+
+    # attention
+    scored = slice(ATTENTION_CALIBRATION, None)
+    directions = head_directions(feats["yaw_ratio"][scored], session["baseline_yaw"],
+                                 params["attention.deviation_threshold"])
+    turns, _ = turn_events(directions, MIN_STABLE_FRAMES)
+    out["turns"] = len(turns)
+
+    # stress
+    scored = slice(STRESS_CALIBRATION, None)
+    base_brow, base_lip = session["baseline_brow"], session["baseline_lip"]
+
+    brow_score = np.minimum(100, np.maximum(0, base_brow - feats["brow_distance"][scored]) / base_brow * 200)
+    lip_score = np.minimum(100, np.maximum(0, base_lip - feats["mar"][scored]) / base_lip * 250)
+
+    _, blinks, _ = blink_events(feats["ear"][scored],
+                                params["stress.ear_threshold"],
+                                params["stress.reopen_threshold"])
+    blink_score = np.minimum(100, per_minute(blinks, timestamps[scored], start_ms) * 3)
+
+    stress = np.minimum(100, 0.40 * brow_score + 0.30 * lip_score + 0.30 * blink_score)
+    out["stress_score"][faces[scored]] = stress
+    out["blinks"] = len(blinks)
+
+    # confusion
+    scored = slice(CONFUSION_CALIBRATION, None)
+    base_inward, base_ear = session["baseline_inward"], session["baseline_ear"]
+    ear = feats["ear"][scored]
+
+    inward_score = np.minimum(100, np.maximum(0, (base_inward - feats["brow_asymmetry"][scored]) / base_inward) * 100)
+    asymmetry_score = np.minimum(100, feats["brow_drop"][scored] * 3)
+    tilt_score = np.minimum(100, np.abs(feats["head_tilt"][scored]) * 2)
+    squint_score = np.where((0.75 * base_ear < ear) & (ear < 0.95 * base_ear), 60, 0)
+
+    yaw_changes, _ = yaw_change_events(feats["yaw_ratio"][scored])
+    yaw_score = np.minimum(100, per_minute(yaw_changes, timestamps[scored], start_ms) / 60 * 40)
+
+    confusion = np.minimum(100, (
+        params["confusion.inward_weight"] * inward_score +
+        params["confusion.asymmetry_weight"] * asymmetry_score +
+        params["confusion.tilt_weight"] * tilt_score +
+        params["confusion.squint_weight"] * squint_score +
+        params["confusion.yaw_weight"] * yaw_score
+    ))
+    out["confusion_score"][faces[scored]] = confusion
+
+    return out
+
+
+def evaluate(params):
+    """
+    Scores one configuration against every labelled session.
+    Returns (objective, {metric: mean over sessions}, params).
+    """
+
+    metrics = {}
+
+    for session in _sessions:
+        labels = session["labels"]
+        out = score_session(session, params)
+
+        predicted = {
+            "sleepy": out["sleepy"],
+            "stressed": out["stress_score"] >= SCORE_CUTOFF,
+            "confused": out["confusion_score"] >= SCORE_CUTOFF,
+        }
+
+        for name in FRAME_LABELS:
+            if name in labels:
+                metrics.setdefault(name, []).append(f1(predicted[name], labels[name]))
+
+        for name in COUNT_LABELS:
+            if name in labels:
+                metrics.setdefault(name, []).append(count_accuracy(out[name], labels[name]))
+
+    metrics = {name: float(np.mean(values)) for name, values in metrics.items()}
+    objective = float(np.mean(list(metrics.values()))) if metrics else 0.0
+
+    return objective, metrics, params
+
+
+_sessions = []
+
+
+def _init_worker(sessions):
+    # sessions reach each worker once, not once per configuration
+    global _sessions
+    _sessions = sessions
+
+
+# ---------- SEARCH SPACE ----------
+def parse_param(spec):
+    """
+    name=v1,v2,... for explicit values or name=low:high[:steps] for a range.
+    Returns (name, values or None, low, high, steps).
+    """
+
+    name, _, value = spec.partition("=")
+    if name not in PARAMETERS:
+        raise SystemExit(f"Unknown parameter {name}, choose from: {', '.join(PARAMETERS)}")
+
+    if "," in value:
+        values = [float(v) for v in value.split(",")]
+        return name, values, min(values), max(values), len(values)
+
+    parts = value.split(":")
+    low, high = float(parts[0]), float(parts[1])
+    steps = int(parts[2]) if len(parts) > 2 else 5
+    return name, None, low, high, steps
+
+
+def valid(config):
+    return all(config[lower] < config[higher] for lower, higher in ORDERED)
+
+
+def configurations(specs, search, samples, seed, max_draws=100):
+    """
+    Grid or random configurations. Parameters not in specs keep their
+    defaults; without specs every parameter is searched over its range.
+    Configurations that break ORDERED are skipped by the grid and redrawn
+    by random search.
+    """
+
+    defaults = {name: default for name, (_, _, default) in PARAMETERS.items()}
+
+    if specs:
+        space = [parse_param(spec) for spec in specs]
+    else:
+        space = [(name, None, low, high, 3) for name, (low, high, _) in PARAMETERS.items()]
+
+    if search == "grid":
+        axes = [
+            values if values is not None else np.linspace(low, high, steps).tolist()
+            for _, values, low, high, steps in space
+        ]
+        for combination in itertools.product(*axes):
+            config = dict(defaults, **{name: v for (name, *_), v in zip(space, combination)})
+            if valid(config):
+                yield config
+        return
+
+    rng = np.random.default_rng(seed)
+    for _ in range(samples):
+        for _ in range(max_draws):
+            config = dict(defaults)
+            for name, values, low, high, _ in space:
+                config[name] = float(rng.choice(values)) if values is not None else float(rng.uniform(low, high))
+            if valid(config):
+                break
+        else:
+            raise SystemExit("No valid configuration in the given ranges: "
+                             + ", ".join(f"{lower} < {higher}" for lower, higher in ORDERED))
+        yield config
+
+
+# ---------- OUTPUT ----------
+def write_table(path, results):
+    metric_names = sorted({name for _, metrics, _ in results for name in metrics})
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "objective"] + metric_names + list(PARAMETERS))
+
+        for rank, (objective, metrics, params) in enumerate(results, 1):
+            writer.writerow(
+                [rank, f"{objective:.4f}"] +
+                [f"{metrics[name]:.4f}" if name in metrics else "" for name in metric_names] +
+                [f"{params[name]:.4f}" for name in PARAMETERS]
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search detector thresholds and weights against labelled sessions."
+    )
+    parser.add_argument("input", help="session log / NPZ file or a directory of them")
+    parser.add_argument("--param", nargs="+", default=[],
+                        help="name=low:high[:steps] or name=v1,v2,... (default: all)")
+    parser.add_argument("--search", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=200,
+                        help="configurations tried by random search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frame-size", default=None, metavar="WxH",
+                        help="frame size when the input does not store it")
+    parser.add_argument("--out", default="sweep.csv", help="ranked results table")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="configurations evaluated in parallel")
+    args = parser.parse_args()
+
+    frame_shape = None
+    if args.frame_size:
+        width, height = (int(v) for v in args.frame_size.lower().split("x"))
+        frame_shape = (height, width)
+
+    # label sidecars and score NPZs hold no landmarks, find_sessions skips them
+    paths = find_sessions(args.input)
+
+    start = time.perf_counter()
+    sessions = []
+    for path in paths:
+        session = prepare(path, frame_shape)
+        if not session["labels"]:
+            print(f"{path}: no labels, skipped")
+            continue
+        sessions.append(session)
+
+    if not sessions:
+        raise SystemExit(f"No labelled sessions found in {args.input}")
+
+    print(f"Features for {len(sessions)} sessions in {time.perf_counter() - start:.1f}s")
+
+    configs = list(configurations(args.param, args.search, args.samples, args.seed))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(sessions,)) as pool:
+        chunksize = max(1, len(configs) // (4 * (args.workers or 1)))
+        results = list(pool.map(evaluate, configs, chunksize=chunksize))
+
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: result[0], reverse=True)
+    write_table(args.out, results)
+
+    print(f"{len(configs)} configurations in {elapsed:.1f}s "
+          f"({len(configs) / elapsed:.0f}/s), table in {args.out}")
+
+    for rank, (objective, metrics, params) in enumerate(results[:5], 1):
+        changed = {k: round(v, 4) for k, v in params.items() if v != PARAMETERS[k][2]}
+        print(f"{rank}. {objective:.4f} {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# the detectors import core.* as when run from Backend/face_detection
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,170 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.features import FEATURE_NAMES, compute_features, frame_features, to_pixels
+from core.fixtures import face_template
+
+
+# power-of-two frame, so landmarks snapped to whole pixels stay exact in
+# float32 and the old helpers' int() truncation changes nothing
+FRAME_SHAPE = (256, 512, 3)
+
+
+# ---------- OLD PER-LANDMARK HELPERS ----------
+# as in the detectors' utils.py before the vectorized engine, reading
+# MediaPipe-style landmarks with .x and .y
+
+def euclidean(p1, p2):
+    return np.linalg.norm(np.array(p1) - np.array(p2))
+
+
+def to_pixel(lm, shape):
+    h, w = shape[:2]
+    return (int(lm.x * w), int(lm.y * h))
+
+
+def old_ear(landmarks, shape):
+    def ear_eye(indices):
+        pts = [to_pixel(landmarks[i], shape) for i in indices]
+        v1 = euclidean(pts[1], pts[5])
+        v2 = euclidean(pts[2], pts[4])
+        h = euclidean(pts[0], pts[3])
+        return (v1 + v2) / (2.0 * h)
+
+    left = ear_eye([33, 160, 158, 133, 153, 144])
+    right = ear_eye([362, 385, 387, 263, 373, 380])
+    return (left + right) / 2.0
+
+
+def old_lip_ratio(landmarks, shape):
+    top, bottom, left, right = (to_pixel(landmarks[i], shape) for i in (13, 14, 61, 291))
+
+    vertical = euclidean(top, bottom)
+    horizontal = euclidean(left, right)
+    return vertical / horizontal if horizontal != 0 else 0
+
+
+def old_brow_distance(landmarks, shape):
+    lb, rb, le, re = (to_pixel(landmarks[i], shape) for i in (105, 334, 159, 386))
+    return (euclidean(lb, le) + euclidean(rb, re)) / 2
+
+
+def old_brow_metrics(landmarks, shape):
+    outer_left, outer_right, inner_left, inner_right, left_eye_top, right_eye_top = (
+        to_pixel(landmarks[i], shape) for i in (70, 300, 105, 334, 159, 386)
+    )
+
+    inner_dist = euclidean(inner_left, inner_right)
+    outer_dist = euclidean(outer_left, outer_right)
+    compression = inner_dist / outer_dist if outer_dist != 0 else 1
+
+    left_drop = left_eye_top[1] - inner_left[1]
+    right_drop = right_eye_top[1] - inner_right[1]
+    return compression, (left_drop + right_drop) / 2, abs(left_drop - right_drop)
+
+
+def old_head_tilt(landmarks, shape):
+    left_eye = to_pixel(landmarks[33], shape)
+    right_eye = to_pixel(landmarks[263], shape)
+    return abs(math.degrees(math.atan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0])))
+
+
+def old_yaw_ratio(landmarks, shape):
+    nose, left_cheek, right_cheek = (to_pixel(landmarks[i], shape) for i in (1, 234, 454))
+
+    left_dist = euclidean(nose, left_cheek)
+    right_dist = euclidean(nose, right_cheek)
+    return left_dist / right_dist if right_dist != 0 else 0
+
+
+def old_features(landmarks, shape):
+    compression, drop, asymmetry = old_brow_metrics(landmarks, shape)
+    return {
+        "ear": old_ear(landmarks, shape),
+        "mar": old_lip_ratio(landmarks, shape),
+        "brow_distance": old_brow_distance(landmarks, shape),
+        "brow_compression": compression,
+        "brow_drop": drop,
+        "brow_asymmetry": asymmetry,
+        "head_tilt": old_head_tilt(landmarks, shape),
+        "yaw_ratio": old_yaw_ratio(landmarks, shape),
+    }
+
+
+# ---------- FIXTURES ----------
+
+def snap(face, shape=FRAME_SHAPE):
+    h, w = shape[:2]
+    face = face.copy()
+    face[:, :2] = np.round(face[:, :2] * (w, h)) / (w, h)
+    return face
+
+
+def as_landmarks(face):
+    return [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in face.tolist()]
+
+
+def jittered_face(seed):
+    rng = np.random.default_rng(seed)
+    face = face_template(seed)
+    face[:, :2] += rng.normal(0, 0.01, face[:, :2].shape)
+    return snap(face)
+
+
+def degenerate_face():
+    # mouth corners, outer brows and nose/right cheek collapsed onto each
+    # other, so every ratio takes its fallback
+    face = snap(face_template())
+    face[291, :2] = face[61, :2]
+    face[300, :2] = face[70, :2]
+    face[454, :2] = face[1, :2]
+    return face
+
+
+FACES = [snap(face_template())] + [jittered_face(seed) for seed in range(1, 9)] + [degenerate_face()]
+
+
+def assert_matches_old(features, face):
+    expected = old_features(as_landmarks(face), FRAME_SHAPE)
+
+    assert set(features) == set(FEATURE_NAMES)
+    for name in FEATURE_NAMES:
+        assert features[name] == pytest.approx(expected[name], rel=1e-5, abs=1e-4), name
+
+
+# ---------- TESTS ----------
+
+@pytest.mark.parametrize("face", FACES)
+def test_compute_features_matches_old_helpers(face):
+    features = compute_features(to_pixels(face, FRAME_SHAPE))
+    assert_matches_old({name: float(value) for name, value in features.items()}, face)
+
+
+def test_degenerate_face_takes_fallbacks():
+    features = compute_features(to_pixels(degenerate_face(), FRAME_SHAPE))
+
+    assert features["mar"] == 0.0
+    assert features["brow_compression"] == 1.0
+    assert features["yaw_ratio"] == 0.0
+
+
+def test_compute_features_keeps_batch_axes():
+    faces = np.stack(FACES)
+    batched = compute_features(to_pixels(faces, FRAME_SHAPE))
+
+    for name in FEATURE_NAMES:
+        assert batched[name].shape == (len(FACES),)
+
+    for i, face in enumerate(FACES):
+        single = compute_features(to_pixels(face, FRAME_SHAPE))
+        for name in FEATURE_NAMES:
+            assert batched[name][i] == pytest.approx(float(single[name]), rel=1e-6), name
+
+
+@pytest.mark.parametrize("face", FACES)
+def test_frame_features_matches_old_helpers(face):
+    features = frame_features.get(face[None], FRAME_SHAPE, FEATURE_NAMES)
+    assert_matches_old({name: float(value) for name, value in features.items()}, face)
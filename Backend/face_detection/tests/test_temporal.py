@@ -0,0 +1,184 @@
+import numpy as np
+import pytest
+
+from attention.main import AttentionDetector
+from core import temporal
+from core.temporal import CENTER, LEFT, RIGHT
+from stress.main import StressDetector
+
+
+CODES = {"CENTER": CENTER, "LEFT": LEFT, "RIGHT": RIGHT}
+
+FRAME_MS = 33
+
+
+# ---------- BLINKS ----------
+
+def stream_blinks(ear, close_threshold=0.22, reopen_threshold=0.25):
+    """
+    StressDetector.step() over ear, after a constant calibration. Returns
+    the closed state and the blink count after each frame.
+    """
+
+    detector = StressDetector(calibration_frames=1, ear_threshold=close_threshold,
+                              reopen_threshold=reopen_threshold)
+    detector.step({"brow_distance": 20.0, "mar": 0.1, "ear": 0.3}, 0)
+
+    closed, counts = [], []
+    for i, value in enumerate(ear, 1):
+        detector.step({"brow_distance": 20.0, "mar": 0.1, "ear": value}, i * FRAME_MS)
+        closed.append(detector.eye_state == "CLOSED")
+        counts.append(detector.blink_counter)
+
+    return np.array(closed), np.array(counts)
+
+
+def assert_blinks_match(ear, close_threshold=0.22, reopen_threshold=0.25):
+    closed, blinks, counts = temporal.blink_events(ear, close_threshold, reopen_threshold)
+    stream_closed, stream_counts = stream_blinks(ear, close_threshold, reopen_threshold)
+
+    np.testing.assert_array_equal(closed, stream_closed)
+    np.testing.assert_array_equal(counts, stream_counts)
+    np.testing.assert_array_equal(blinks, np.flatnonzero(np.diff(stream_counts, prepend=0)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_blink_events_matches_stream(seed):
+    rng = np.random.default_rng(seed)
+    ear = rng.uniform(0.15, 0.32, 600)
+    assert_blinks_match(ear.tolist())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_blink_events_matches_stream_on_thresholds(seed):
+    # values exactly on either threshold neither close nor reopen the eye
+    rng = np.random.default_rng(seed)
+    ear = rng.choice([0.10, 0.2199, 0.22, 0.23, 0.25, 0.2501, 0.30], 600)
+    assert_blinks_match(ear.tolist())
+
+
+def test_blink_events_threshold_edges():
+    # closes below 0.22 only, reopens above 0.25 only
+    ear = [0.22, 0.25, 0.21, 0.25, 0.22, 0.26, 0.21, 0.2501]
+    closed, blinks, counts = temporal.blink_events(ear)
+
+    assert closed.tolist() == [False, False, True, True, True, False, True, False]
+    assert blinks.tolist() == [5, 7]
+    assert counts[-1] == 2
+    assert_blinks_match(ear)
+
+
+def test_blink_events_float32_series():
+    rng = np.random.default_rng(7)
+    ear = rng.uniform(0.15, 0.32, 600).astype(np.float32)
+    assert_blinks_match(list(ear))
+
+
+# ---------- TURNS ----------
+
+# exact in binary, so yaw at baseline +- threshold is exactly on the edge
+BASELINE = 0.25
+THRESHOLD = 0.5
+MIN_STABLE = 10
+
+
+def stream_turns(yaw):
+    """
+    AttentionDetector.step() over yaw, after a constant calibration at
+    BASELINE. Returns the direction codes, the baseline each frame was
+    scored against and the turn count after each frame.
+    """
+
+    detector = AttentionDetector(consec_frames=MIN_STABLE, calibration_frames=5,
+                                 deviation_threshold=THRESHOLD)
+    for i in range(5):
+        detector.step({"yaw_ratio": BASELINE}, i * FRAME_MS)
+
+    directions, baselines, counts = [], [], []
+    for i, value in enumerate(yaw, 5):
+        result = detector.step({"yaw_ratio": value}, i * FRAME_MS)
+        directions.append(CODES[result.state])
+        baselines.append(result.features["baseline_yaw"])
+        counts.append(detector.turn_count)
+
+    return np.array(directions), np.array(baselines), np.array(counts)
+
+
+def direction_runs(rng, runs):
+    """
+    Direction codes made of runs around MIN_STABLE long, in random order.
+    """
+
+    lengths = rng.choice([1, MIN_STABLE - 1, MIN_STABLE, MIN_STABLE + 1, 25], runs)
+    sides = rng.choice([CENTER, LEFT, RIGHT], runs)
+    return np.repeat(sides, lengths)
+
+
+def yaw_for(directions, rng):
+    # clear of the threshold, on either side of the baseline
+    offset = rng.uniform(THRESHOLD + 0.05, THRESHOLD + 0.3, len(directions))
+    return BASELINE + directions * offset
+
+
+def assert_turns_match(yaw):
+    stream_directions, baselines, stream_counts = stream_turns(yaw)
+
+    directions = temporal.head_directions(yaw, baselines, THRESHOLD)
+    np.testing.assert_array_equal(directions, stream_directions)
+
+    turns, counts = temporal.turn_events(directions, MIN_STABLE)
+    np.testing.assert_array_equal(counts, stream_counts)
+    np.testing.assert_array_equal(turns, np.flatnonzero(np.diff(stream_counts, prepend=0)))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_turn_events_matches_stream(seed):
+    rng = np.random.default_rng(seed)
+    directions = direction_runs(rng, 80)
+    assert_turns_match(yaw_for(directions, rng).tolist())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_turn_events_matches_stream_without_center(seed):
+    # side changes with no center frame in between
+    rng = np.random.default_rng(seed)
+    lengths = rng.choice([MIN_STABLE - 1, MIN_STABLE, MIN_STABLE + 1], 60)
+    sides = np.where(np.arange(60) % 2, LEFT, RIGHT)
+    rng.shuffle(sides)
+    directions = np.repeat(sides, lengths)
+    assert_turns_match(yaw_for(directions, rng).tolist())
+
+
+def test_turn_events_threshold_edges():
+    # a deviation of exactly the threshold is still center
+    on_edge = [BASELINE + THRESHOLD] * MIN_STABLE + [BASELINE - THRESHOLD] * MIN_STABLE
+    directions = temporal.head_directions(on_edge, BASELINE, THRESHOLD)
+
+    assert (directions == CENTER).all()
+    assert_turns_match(on_edge)
+
+
+def test_turn_events_run_lengths():
+    # one short of MIN_STABLE, exactly MIN_STABLE, the same side again,
+    # then the other side
+    directions = np.concatenate([
+        [LEFT] * (MIN_STABLE - 1), [CENTER],
+        [LEFT] * MIN_STABLE, [CENTER] * 3,
+        [LEFT] * (MIN_STABLE + 5), [CENTER],
+        [RIGHT] * MIN_STABLE,
+    ])
+    turns, counts = temporal.turn_events(directions, MIN_STABLE)
+
+    assert turns.tolist() == [19, 48]
+    assert counts[-1] == 2
+    assert_turns_match((BASELINE + directions * 0.75).tolist())
+
+
+def test_turn_events_first_turn_mixes_sides():
+    # before any turn, non-center frames of either side add up
+    half = MIN_STABLE // 2
+    directions = np.array([LEFT] * half + [RIGHT] * (MIN_STABLE - half) + [CENTER])
+    turns, counts = temporal.turn_events(directions, MIN_STABLE)
+
+    assert turns.tolist() == [MIN_STABLE - 1]
+    assert_turns_match((BASELINE + directions * 0.75).tolist())